@@ -1,10 +1,15 @@
 import asyncio
-import glob
+import copy
+import fnmatch
+import functools
 import hashlib
 import json
 import os
+import re
+import shlex
 import shutil
 import subprocess
+import threading
 import time
 from datetime import datetime
 from pathlib import Path
@@ -13,23 +18,232 @@ import yaml
 
 from insurgent.Logging.logger import error, log, info, warning, success
 from insurgent.Logging.terminal import *
-from insurgent.Meta.config import load_config, validate_config
+from insurgent.Meta.config import load_config, load_config_cached, validate_config
 from insurgent.TUI.box import Box
 from insurgent.TUI.text import Text
 from insurgent.TUI.table import Table
 
+# Source file extensions and the kind of compile each one needs
+SOURCE_FILE_TYPES = {
+    ".c": "c",
+    ".cpp": "cpp",
+    ".cc": "cpp",
+    ".cxx": "cpp",
+    ".s": "asm",
+    ".asm": "asm",
+}
+
+# Read size used when streaming files through the hasher
+HASH_CHUNK_SIZE = 1 << 20
+
+# Files modified this recently may still change without their mtime moving on
+# filesystems with coarse timestamps, so their mtime is not trusted
+RACY_MTIME_WINDOW_NS = 2 * 10**9
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_ignore_patterns(patterns):
+    """
+    Compile ignore patterns into a single regex matched against file names.
+
+    Patterns are shell-style globs. Patterns without any wildcard keep their
+    historical meaning of a file name prefix. Cached so each project's
+    patterns are only translated once per process.
+
+    Args:
+        patterns: Tuple of ignore patterns from the project configuration
+
+    Returns:
+        Compiled regex, or None if there are no patterns
+    """
+    if not patterns:
+        return None
+
+    translated = []
+    for pattern in patterns:
+        if not any(c in pattern for c in "*?["):
+            pattern += "*"
+        translated.append(fnmatch.translate(pattern))
+    return re.compile("|".join(translated))
+
+
+def _available_cpus():
+    """Return the number of CPUs this process may run on"""
+    try:
+        # Honours CPU affinity masks and cpusets, e.g. in containers
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _config_stat_key(config_path):
+    """Return the (mtime_ns, size) key of a config file, or None if missing"""
+    try:
+        st = os.stat(config_path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _resolve_compilers(language, compiler):
+    """
+    Resolve the C and C++ compilers for a project.
+
+    Args:
+        language: Project language from the configuration
+        compiler: Compiler from the configuration, or an empty string
+
+    Returns:
+        Tuple of (c_compiler, cxx_compiler)
+    """
+    # For C++ projects, use the specified compiler for both C and C++
+    if language.lower() in ["cpp", "c++"]:
+        c_compiler = compiler
+        cxx_compiler = compiler
+    else:
+        # For C projects
+        c_compiler = compiler
+        cxx_compiler = "c++"  # default C++ compiler
+
+    # If compiler not specified, use defaults
+    if not c_compiler:
+        c_compiler = "gcc"
+    if not cxx_compiler:
+        cxx_compiler = "g++"
+
+    return c_compiler, cxx_compiler
+
+
+# Compiler launchers that can cache object files, in order of preference
+COMPILER_CACHE_LAUNCHERS = ("sccache", "ccache")
+
+
+@functools.lru_cache(maxsize=32)
+def _resolve_compiler_cache(setting, path):
+    """
+    Resolve the compiler cache launcher to prefix compile commands with.
+
+    Args:
+        setting: The project's compiler_cache setting; True to use the first
+            available launcher, False to disable, or a launcher command
+        path: PATH value the launcher is looked up on; part of the cache key
+
+    Returns:
+        Launcher command, or None if compiles shouldn't go through a cache
+    """
+    if not setting:
+        return None
+    if isinstance(setting, str):
+        return setting if shutil.which(shlex.split(setting)[0], path=path) else None
+    for launcher in COMPILER_CACHE_LAUNCHERS:
+        if shutil.which(launcher, path=path):
+            return launcher
+    return None
+
+
+# Source types compiled by a gcc-compatible driver, which can emit header
+# dependencies; assembly goes straight to the assembler
+DEPFILE_SOURCE_TYPES = ("c", "cpp")
+
+# A path in a Make-format dependency file, where spaces are backslash-escaped
+_DEPFILE_PATH_RE = re.compile(r"(?:\\.|[^\s\\])+")
+
+
+def _parse_depfile(text):
+    """
+    Parse the dependencies out of a Make-format file written by gcc -MMD.
+
+    Only the first rule is read; the phony header rules added by -MP are
+    ignored.
+
+    Args:
+        text: Contents of the dependency file
+
+    Returns:
+        List of dependency paths, or None if no rule was found
+    """
+    rule = text.replace("\\\n", " ").split("\n", 1)[0]
+    # The target may itself contain a colon (e.g. a Windows drive letter)
+    _, sep, deps = rule.partition(": ")
+    if not sep:
+        return None
+    return [
+        re.sub(r"\\([ #])", r"\1", path).replace("$$", "$")
+        for path in _DEPFILE_PATH_RE.findall(deps)
+    ]
+
+
+def _ninja_escape(text):
+    """Escape a path for use in a Ninja build statement"""
+    return text.replace("$", "$$").replace(" ", "$ ").replace(":", "$:")
+
+
+def _ninja_command(args):
+    """Join a command for use as a Ninja rule's command, quoting for the shell"""
+    return shlex.join(args).replace("$", "$$")
+
+
+def _new_file_hasher():
+    """Create the hasher used for source file fingerprints"""
+    return hashlib.blake2b(digest_size=16)
+
 
 class BuildEngine:
-    def __init__(self, project_path: str):
+    # Engines constructed in this process, keyed by real project path, so that
+    # projects reachable through several parents are only initialized once
+    _REGISTRY = {}
+    # Serializes engine setup, so a thread never sees another thread's engine
+    # half initialized; reentrant for subprojects set up during initialization
+    _REGISTRY_LOCK = threading.RLock()
+
+    def __new__(cls, project_path: str, config: dict = None):
+        if config:
+            # An explicit config gets a private engine; the shared one is
+            # left as project.yaml describes it
+            engine = super().__new__(cls)
+            engine._initialized = False
+            return engine
+
+        key = os.path.realpath(project_path)
+        with cls._REGISTRY_LOCK:
+            engine = cls._REGISTRY.get(key)
+            if engine is None or engine._is_stale():
+                engine = super().__new__(cls)
+                engine._initialized = False
+                cls._REGISTRY[key] = engine
+        return engine
+
+    def __init__(self, project_path: str, config: dict = None):
         """
         Initialize the build engine for a project.
 
         Args:
             project_path: Path to the project directory containing project.yaml
+            config: Optional configuration to use instead of project.yaml
         """
+        with self._REGISTRY_LOCK:
+            if self._initialized:
+                return
+            # Mark early so a subproject cycle can't recurse back into this engine
+            self._initialized = True
+            try:
+                self._initialize(project_path, config)
+            except BaseException:
+                key = os.path.realpath(project_path)
+                if self._REGISTRY.get(key) is self:
+                    del self._REGISTRY[key]
+                raise
+
+    def _initialize(self, project_path, config=None):
+        """Set up a freshly constructed engine"""
         self.project_path = os.path.abspath(project_path)
-        self.jobs = os.cpu_count() or 1
-        self.config = self._load_project_config()
+        self.jobs = _available_cpus()
+        self._subproject_engines = None
+        self._config_key = _config_stat_key(
+            os.path.join(self.project_path, "project.yaml")
+        )
+        # Copied, as the loaded config is shared through the in-process memo
+        self.config = copy.deepcopy(config or self._load_project_config())
 
         # Add the config_path to the config for later reference
         if self.config:
@@ -44,22 +258,29 @@ class BuildEngine:
         self.ar = self._detect_tool("ar", "ar")
         self.as_tool = self._detect_tool("as", "as")
         self.ld = self._detect_tool("ld", self.cxx_compiler)
+        self._refresh_compiler_flags()
 
         self.build_dir = os.path.join(self.project_path, "obj")
         self.cache_file = os.path.join(self.build_dir, "cache.json")
-        os.makedirs(self.build_dir, exist_ok=True)
 
-        # Load build cache for incremental builds
+        # Load build cache for incremental builds; the build and output
+        # directories are only created once something is built
         self.build_cache = self._load_build_cache()
+        self._cache_dirty = False
 
-        # Create output directory if it doesn't exist
-        if self.config and "output" in self.config:
-            output_dir = os.path.dirname(
-                os.path.join(self.project_path, self.config["output"])
-            )
-            os.makedirs(output_dir, exist_ok=True)
+    def _is_stale(self, _seen=None):
+        """Check whether project.yaml of this engine or a subproject has changed"""
+        config_path = os.path.join(self.project_path, "project.yaml")
+        if _config_stat_key(config_path) != self._config_key:
+            return True
 
-        self.subproject_engines = self._initialize_subprojects()
+        seen = _seen if _seen is not None else set()
+        seen.add(id(self))
+        # Subprojects that were never loaded can't be stale
+        return any(
+            id(engine) not in seen and engine._is_stale(seen)
+            for engine in (self._subproject_engines or {}).values()
+        )
 
     def _load_project_config(self):
         """Load project configuration from project.yaml"""
@@ -69,32 +290,75 @@ class BuildEngine:
             return {}
 
         info(f"Loading project configuration from {config_path}...")
-        return load_config(config_path)
+        return self._load_project_config_cached(config_path)
+
+    def _load_project_config_cached(self, config_path):
+        """
+        Load project.yaml, reusing a previously parsed copy when unchanged.
+
+        The parsed config is memoized in-process by load_config_cached() and
+        persisted as a JSON side-car in the build directory, both keyed by the
+        YAML file's (mtime_ns, size). YAML is only re-parsed when that key
+        changes.
+
+        Args:
+            config_path: Path to the project.yaml file
+
+        Returns:
+            Dictionary with project configuration or empty dict if error
+        """
+        return load_config_cached(config_path, load=self._read_project_config)
+
+    def _read_project_config(self, config_path):
+        """Read project.yaml through its JSON side-car, refreshing the side-car"""
+        key = _config_stat_key(config_path)
+        if key is None:
+            return load_config(config_path)
+
+        sidecar = os.path.join(self.project_path, "obj", "project.yaml.json")
+        try:
+            with open(sidecar, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("key") == key and isinstance(cached.get("config"), dict):
+                return cached["config"]
+        except (OSError, ValueError):
+            pass
+
+        config = load_config(config_path)
+        if not config:
+            return config
+
+        try:
+            payload = json.dumps({"key": key, "config": config})
+        except (TypeError, ValueError) as e:
+            # Configs with non-JSON values (e.g. YAML dates) just skip the side-car
+            warning(f"Could not cache project configuration: {e}")
+            return config
+        # JSON silently turns non-string keys into strings; only cache configs
+        # that read back exactly as they were parsed
+        if json.loads(payload)["config"] != config:
+            return config
+
+        tmp_path = f"{sidecar}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(sidecar), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp_path, sidecar)
+        except OSError as e:
+            warning(f"Could not cache project configuration: {e}")
+
+        return config
 
     def _detect_compilers(self):
         """Detect the compilers to use based on the configuration"""
         if not self.config:
             return "cc", "c++"
 
-        # Use specific compiler from config
-        compiler = self.config.get("compiler", "")
-
-        # For C++ projects, use the specified compiler for both C and C++
-        if self.config.get("language", "").lower() in ["cpp", "c++"]:
-            c_compiler = compiler
-            cxx_compiler = compiler
-        else:
-            # For C projects
-            c_compiler = compiler
-            cxx_compiler = "c++"  # default C++ compiler
-
-        # If compiler not specified, use defaults
-        if not c_compiler:
-            c_compiler = "gcc"
-        if not cxx_compiler:
-            cxx_compiler = "g++"
-
-        return c_compiler, cxx_compiler
+        return _resolve_compilers(
+            str(self.config.get("language") or ""),
+            str(self.config.get("compiler") or ""),
+        )
 
     def _detect_tool(self, tool_name, default_tool):
         """Detect system tools based on configuration"""
@@ -107,6 +371,17 @@ class BuildEngine:
 
         return default_tool
 
+    @property
+    def subproject_engines(self):
+        """Build engines for the subprojects, created on first use"""
+        if self._subproject_engines is None:
+            self._subproject_engines = self._initialize_subprojects()
+        return self._subproject_engines
+
+    @subproject_engines.setter
+    def subproject_engines(self, engines):
+        self._subproject_engines = engines
+
     def _initialize_subprojects(self):
         """Initialize build engines for all subprojects"""
         if not self.config:
@@ -146,50 +421,151 @@ class BuildEngine:
 
         return subproject_engines
 
+    @staticmethod
+    def _new_build_cache():
+        """Create an empty build cache"""
+        return {
+            "file_hashes": {},
+            "last_build_time": 0,
+            "compiler_flags": "",
+            "output_file": "",
+        }
+
     def _load_build_cache(self):
         """Load the build cache for incremental builds"""
+        cache = self._new_build_cache()
         if os.path.exists(self.cache_file):
             try:
-                with open(self.cache_file, "r") as f:
-                    return json.load(f)
+                with open(self.cache_file, "rb") as f:
+                    loaded = json.loads(f.read())
+                if not isinstance(loaded, dict) or not isinstance(
+                    loaded.get("file_hashes", {}), dict
+                ):
+                    raise ValueError("unexpected cache layout")
+                cache.update(loaded)
             except Exception as e:
                 warning(f"Could not load build cache: {e}")
 
-        return {
-            "file_hashes": {},
-            "last_build_time": 0,
-            "compiler_flags": "",
-            "output_file": "",
-        }
+        return cache
 
     def _save_build_cache(self):
-        """Save the build cache to disk"""
+        """Save the build cache to disk if it changed since it was last saved"""
+        if not self._cache_dirty:
+            return
+
+        # Per-process temp file, so concurrent builds never interleave writes
+        tmp_path = f"{self.cache_file}.{os.getpid()}.tmp"
         try:
-            with open(self.cache_file, "w") as f:
-                json.dump(self.build_cache, f, indent=2)
+            data = json.dumps(self.build_cache, separators=(",", ":"))
+            os.makedirs(self.build_dir, exist_ok=True)
+            with open(tmp_path, "w") as f:
+                f.write(data)
+            # Replace atomically so an interrupted write never corrupts the cache
+            os.replace(tmp_path, self.cache_file)
+            self._cache_dirty = False
         except Exception as e:
             error(f"Could not save build cache: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _hash_file(self, file_path):
+        """Stream a file through BLAKE2b and return its hex digest"""
+        with open(file_path, "rb", buffering=0) as f:
+            if hasattr(hashlib, "file_digest"):
+                return hashlib.file_digest(f, _new_file_hasher).hexdigest()
+            # Python < 3.11: read into one reusable buffer like file_digest does
+            hasher = _new_file_hasher()
+            buf = bytearray(HASH_CHUNK_SIZE)
+            view = memoryview(buf)
+            while size := f.readinto(buf):
+                hasher.update(view[:size])
+            return hasher.hexdigest()
+
+    def _prune_fingerprints(self, source_files, headers):
+        """
+        Drop fingerprints of files that are no longer part of the build.
+
+        Args:
+            source_files: Every source file of the current build
+            headers: Every header the current build's objects depend on
+        """
+        file_hashes = self.build_cache["file_hashes"]
+        live = set(source_files)
+        live.update(headers)
+        stale = [path for path in file_hashes if path not in live]
+        for path in stale:
+            del file_hashes[path]
+        if stale:
+            self._cache_dirty = True
+
+    @staticmethod
+    def _stat_or_none(path):
+        """Stat a path, returning None instead of raising if it doesn't exist"""
+        try:
+            return os.stat(path)
+        except FileNotFoundError:
+            return None
+
+    def _check_file(self, file_path, st=None):
+        """
+        Check a file against the build cache without modifying the cache.
+
+        Args:
+            file_path: Path to the source file
+            st: Optional stat result for file_path, to avoid stating it again
+
+        Returns:
+            Tuple of (changed, fingerprint) where fingerprint is the
+            [size, mtime_ns, digest] entry to record once the file has been
+            built, or None if the file could not be read
+        """
+        try:
+            st = st or os.stat(file_path)
+        except OSError:
+            return True, None
+
+        entry = self.build_cache["file_hashes"].get(file_path)
+        # Entries from older caches were bare digests; treat those as changed
+        valid_entry = isinstance(entry, list) and len(entry) == 3
+
+        # Quick check: unchanged size and mtime means unchanged contents
+        if valid_entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+            return False, entry
 
-    def _update_file_hash(self, file_path):
-        """Update the hash of a file in the build cache"""
         try:
-            with open(file_path, "rb") as f:
-                file_hash = hashlib.md5(f.read()).hexdigest()
-                self.build_cache["file_hashes"][file_path] = file_hash
-                return file_hash
+            file_hash = self._hash_file(file_path)
         except Exception as e:
             error(f"Could not hash file {file_path}: {e}")
-            return None
+            return True, None
 
-    def _has_file_changed(self, file_path):
-        """Check if a file has changed since the last build"""
-        if file_path not in self.build_cache["file_hashes"]:
-            return True
+        # A racily recent mtime is recorded as 0 so the next check rehashes
+        mtime_ns = st.st_mtime_ns
+        if mtime_ns > time.time_ns() - RACY_MTIME_WINDOW_NS:
+            mtime_ns = 0
+        fingerprint = [st.st_size, mtime_ns, file_hash]
+        return not valid_entry or entry[2] != file_hash, fingerprint
 
-        old_hash = self.build_cache["file_hashes"][file_path]
-        new_hash = self._update_file_hash(file_path)
+    def _has_file_changed(self, file_path, st=None):
+        """
+        Check if a file has changed since the last build, recording its
+        current fingerprint in the build cache.
 
-        return old_hash != new_hash
+        Args:
+            file_path: Path to the source file
+            st: Optional stat result for file_path, to avoid stating it again
+        """
+        changed, fingerprint = self._check_file(file_path, st)
+        self._record_fingerprint(file_path, fingerprint)
+        return changed
+
+    def _record_fingerprint(self, file_path, fingerprint):
+        """Store a fingerprint from _check_file in the build cache"""
+        file_hashes = self.build_cache["file_hashes"]
+        if fingerprint is not None and file_hashes.get(file_path) != fingerprint:
+            file_hashes[file_path] = fingerprint
+            self._cache_dirty = True
 
     def _get_compiler_flags(self):
         """Get the appropriate compiler flags from the configuration"""
@@ -219,10 +595,65 @@ class BuildEngine:
             "as": as_flags.strip(),
         }
 
+    def _refresh_compiler_flags(self):
+        """Compute the arguments shared by every compile and link of a build"""
+        self._compiler_flags = self._get_compiler_flags()
+        self._compiler_args = {
+            tool: shlex.split(flags) for tool, flags in self._compiler_flags.items()
+        }
+        self._include_args = [f"-I{dir}" for dir in self.config.get("include_dirs", [])]
+        self._define_args = [f"-D{define}" for define in self.config.get("defines", [])]
+
+        # C and C++ compiles go through ccache/sccache when one is available
+        cache_setting = self.config.get("compiler_cache", True)
+        if not isinstance(cache_setting, str):
+            cache_setting = bool(cache_setting)
+        launcher = _resolve_compiler_cache(cache_setting, os.environ.get("PATH"))
+        launcher_args = shlex.split(launcher) if launcher else []
+
+        def compile_command(compiler, cacheable):
+            command = shlex.split(compiler)
+            if not cacheable or not launcher_args:
+                return command
+            # Don't double wrap a compiler that is already configured as
+            # e.g. "ccache gcc"
+            if command and os.path.basename(command[0]) in COMPILER_CACHE_LAUNCHERS:
+                return command
+            return [*launcher_args, *command]
+
+        # Everything before the source and object paths, per source type
+        self._compile_prefix = {
+            file_type: [
+                *compile_command(compiler, file_type != "asm"),
+                *self._compiler_args[flags_key],
+                *self._include_args,
+                *self._define_args,
+                "-c",
+            ]
+            for file_type, compiler, flags_key in (
+                ("c", self.c_compiler, "c"),
+                ("cpp", self.cxx_compiler, "cpp"),
+                ("asm", self.as_tool, "as"),
+            )
+        }
+
     def _find_source_files(self):
         """Find all source files for the project"""
+        return [source_file for source_file, _, _ in self._iter_sources()]
+
+    def _iter_sources(self):
+        """
+        Yield the project's source files as they are discovered.
+
+        Yields:
+            (source_file, entry, file_type) tuples, where entry is the file's
+            os.DirEntry (its stat() result is fetched lazily and cached by the
+            entry) and file_type is one of "c", "cpp" or "asm"
+        """
         project_dirs = self.config.get("project_dirs", [])
-        ignore_patterns = self.config.get("ignore", [])
+        ignore_re = _compile_ignore_patterns(
+            tuple(str(pattern) for pattern in self.config.get("ignore") or ())
+        )
 
         # If no project dirs specified, use all sub directories
         if not project_dirs:
@@ -234,7 +665,6 @@ class BuildEngine:
         ]
 
         # Find all source files in project directories
-        source_files = []
         for d in project_dirs:
             # First check if the directory exists
             if not os.path.exists(d):
@@ -254,27 +684,157 @@ class BuildEngine:
                 )
                 continue
 
-            for ext in [".c", ".cpp", ".cc", ".cxx", ".s", ".asm"]:
-                pattern = os.path.join(d, f"**/*{ext}")
-                source_files.extend(glob.glob(pattern, recursive=True))
-
-        # Filter out ignored files
-        if ignore_patterns:
-            for pattern in ignore_patterns:
-                source_files = [
-                    f
-                    for f in source_files
-                    if not os.path.basename(f).startswith(pattern)
-                ]
+            for entry, file_type in self._walk_sources(d, ignore_re):
+                yield entry.path, entry, file_type
+
+    def _walk_sources(self, directory, ignore_re=None, nested=False, _seen=None):
+        """
+        Recursively yield (entry, file_type) for source files in a single pass.
 
-        return source_files
+        Uses the file type cached on each directory entry, so no extra stat
+        is needed per file. Hidden entries are skipped, as are nested
+        directories that carry their own project.yaml. Symlinked directories
+        are followed, but each directory is only walked once.
+
+        Args:
+            directory: Directory to walk
+            ignore_re: Compiled ignore patterns; matching file names are skipped
+            nested: Whether directory is below the project directory being walked
+        """
+        # Guard against symlink cycles and directories reachable twice
+        _seen = set() if _seen is None else _seen
+        try:
+            st = os.stat(directory)
+            dir_key = (st.st_dev, st.st_ino)
+            if dir_key in _seen:
+                return
+            _seen.add(dir_key)
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            return
+
+        # Nested projects are built on their own, not as part of this one
+        if nested and any(entry.name == "project.yaml" for entry in entries):
+            return
+
+        for entry in entries:
+            name = entry.name
+            if name.startswith("."):
+                continue
+            if entry.is_dir():
+                yield from self._walk_sources(entry.path, ignore_re, True, _seen)
+            else:
+                file_type = SOURCE_FILE_TYPES.get(os.path.splitext(name)[1])
+                if file_type is None or not entry.is_file():
+                    continue
+                if ignore_re and ignore_re.match(name):
+                    continue
+                yield entry, file_type
+
+    def _relative_path(self, path):
+        """Get a path relative to the project directory"""
+        # Walked sources are normalized paths below the project directory, so
+        # slicing off the prefix is enough and much cheaper than relpath()
+        prefix = os.path.join(self.project_path, "")
+        if path.startswith(prefix) and os.sep + ".." not in path:
+            return path[len(prefix) :]
+        return os.path.relpath(path, self.project_path)
 
     def _get_object_file_path(self, source_file):
         """Get the path to the object file for a source file"""
-        rel_path = os.path.relpath(source_file, self.project_path)
-        obj_path = os.path.join(self.build_dir, rel_path + ".o")
-        os.makedirs(os.path.dirname(obj_path), exist_ok=True)
-        return obj_path
+        return os.path.join(self.build_dir, self._relative_path(source_file) + ".o")
+
+    async def _run_process(
+        self, argv, silent=False, shell=False, cwd=None, capture_stdout=False
+    ):
+        """
+        Run a build tool, streaming its stdout to the terminal unless silent.
+
+        Only stderr is captured, for reporting failures.
+
+        Args:
+            argv: Argument list, or a command string when shell is True
+            silent: Whether to discard the tool's stdout
+            shell: Whether to run argv through the shell
+            cwd: Working directory for the tool
+            capture_stdout: Capture stdout along with stderr instead of
+                discarding it when silent, for tools that report errors there
+
+        Returns:
+            Tuple of (returncode, stderr bytes)
+        """
+        stdout = asyncio.subprocess.DEVNULL if silent else None
+        stderr = asyncio.subprocess.PIPE
+        if silent and capture_stdout:
+            # Read both streams through one pipe
+            stdout, stderr = asyncio.subprocess.PIPE, asyncio.subprocess.STDOUT
+        if shell:
+            process = await asyncio.create_subprocess_shell(
+                argv, stdout=stdout, stderr=stderr, cwd=cwd
+            )
+        else:
+            process = await asyncio.create_subprocess_exec(
+                *argv, stdout=stdout, stderr=stderr, cwd=cwd
+            )
+        pipe = process.stderr if process.stderr is not None else process.stdout
+
+        try:
+            # Drain the pipe before waiting so a full pipe can't block the tool
+            stderr = await pipe.read()
+            await process.wait()
+        except asyncio.CancelledError:
+            # The build was abandoned; don't leave the tool running
+            process.kill()
+            await process.wait()
+            raise
+
+        return process.returncode, stderr
+
+    @staticmethod
+    def _get_deps_file_path(obj_file):
+        """Get the path to the header dependency file written next to an object"""
+        return os.path.splitext(obj_file)[0] + ".d"
+
+    def _load_deps(self, obj_file):
+        """
+        Load the headers an object file was last compiled against.
+
+        Args:
+            obj_file: Path to the object file
+
+        Returns:
+            List of absolute header paths, or None if the dependency file is
+            missing or unreadable
+        """
+        try:
+            with open(self._get_deps_file_path(obj_file), "r", encoding="utf-8") as f:
+                deps = _parse_depfile(f.read())
+        except (OSError, UnicodeDecodeError):
+            return None
+        if not deps:
+            return None
+        # The first dependency is the source file itself
+        return [os.path.abspath(dep) for dep in deps[1:]]
+
+    def _deps_changed(self, deps, header_state):
+        """
+        Check whether any header in deps changed since it was last recorded.
+
+        Args:
+            deps: Header paths from _load_deps
+            header_state: Per-build memo of header path -> _check_file result
+
+        Returns:
+            True if any header changed or can no longer be read
+        """
+        for dep in deps:
+            state = header_state.get(dep)
+            if state is None:
+                state = header_state[dep] = self._check_file(dep)
+            if state[0]:
+                return True
+        return False
 
     async def _compile_file(self, source_file, obj_file, file_type, silent=False):
         """Compile a source file to an object file"""
@@ -282,65 +842,250 @@ class BuildEngine:
             error(f"Source file {source_file} not found!")
             return False
 
-        compiler_flags = self._get_compiler_flags()
-
-        # Choose the appropriate compiler and flags
-        if file_type == "c":
-            compiler = self.c_compiler
-            flags = compiler_flags["c"]
-        elif file_type == "cpp":
-            compiler = self.cxx_compiler
-            flags = compiler_flags["cpp"]
-        elif file_type == "asm":
-            compiler = self.as_tool
-            flags = compiler_flags["as"]
-        else:
+        prefix = self._compile_prefix.get(file_type)
+        if prefix is None:
             error(f"Unknown file type: {file_type}")
             return False
 
-        # Add include directories
-        include_dirs = self.config.get("include_dirs", [])
-        include_flags = " ".join(f"-I{dir}" for dir in include_dirs)
-
-        # Add defines
-        defines = self.config.get("defines", [])
-        define_flags = " ".join(f"-D{define}" for define in defines)
-
-        # Construct the compiler command
-        cmd = f"{compiler} {flags} {include_flags} {define_flags} -c {source_file} -o {obj_file}"
+        # Construct the compiler command, having gcc-compatible compilers
+        # record the headers they read for the next incremental build
+        argv = [*prefix, source_file, "-o", obj_file]
+        if file_type in DEPFILE_SOURCE_TYPES:
+            argv[-3:-3] = ["-MMD", "-MP", "-MF", self._get_deps_file_path(obj_file)]
 
         if not silent:
             # Display compilation progress using styled text
-            rel_path = os.path.relpath(source_file, self.project_path)
+            rel_path = self._relative_path(source_file)
             info(f"Compiling {Text.style(rel_path, color='cyan')}...")
 
         # Execute the compilation command
         try:
-            process = await asyncio.create_subprocess_shell(
-                cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-
-            stdout, stderr = await process.communicate()
-            if process.returncode != 0:
+            returncode, stderr = await self._run_process(argv, silent)
+            if returncode != 0:
                 if stderr:
-                    error_msg = stderr.decode()
+                    error_msg = stderr.decode(errors="replace")
                     error(f"Compilation failed:\n{error_msg}", use_box=True)
                 else:
                     error("Compilation failed with no error message.", use_box=True)
                 return False
 
-            if not silent and stdout:
-                stdout_str = stdout.decode()
-                if stdout_str.strip():
-                    print(stdout_str)
-
             return True
         except Exception as e:
             error(f"Compilation error: {e}", use_box=True)
             return False
 
+    async def _compile_parallel(self, files_to_compile, silent=False, semaphore=None):
+        """
+        Compile files concurrently, running at most self.jobs at a time.
+
+        Stops at the first failure and cancels the compiles still pending.
+
+        Args:
+            files_to_compile: List of (source_file, obj_file, file_type) tuples
+            silent: Whether to suppress output
+            semaphore: Job semaphore shared with concurrently building projects
+
+        Returns:
+            True if every file compiled successfully, False otherwise
+        """
+        semaphore = semaphore or asyncio.Semaphore(self.jobs)
+
+        async def guarded(source_file, obj_file, file_type):
+            async with semaphore:
+                return await self._compile_file(
+                    source_file, obj_file, file_type, silent
+                )
+
+        pending = {asyncio.create_task(guarded(*entry)) for entry in files_to_compile}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is not None:
+                        error(f"Compilation error: {task.exception()}", use_box=True)
+                        return False
+                    if task.result() is False:
+                        # _compile_file already printed the error
+                        return False
+            return True
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    def _get_link_state(self, obj_files, output_file, output_type):
+        """
+        Fingerprint everything that goes into the link step.
+
+        Args:
+            obj_files: Object files to be linked
+            output_file: Path of the executable or library
+            output_type: Configured output type
+
+        Returns:
+            Dictionary with object and flag digests, or None if an object
+            file is missing
+        """
+        obj_hasher = _new_file_hasher()
+        for obj_file in sorted(obj_files):
+            st = self._stat_or_none(obj_file)
+            if st is None:
+                return None
+            obj_hasher.update(f"{obj_file}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+
+        # Libraries linked in from outside the object list must also be unchanged
+        for input_file in self._get_link_library_files():
+            st = self._stat_or_none(input_file)
+            if st is not None:
+                obj_hasher.update(
+                    f"{input_file}\0{st.st_size}\0{st.st_mtime_ns}\n".encode()
+                )
+
+        flags_hasher = _new_file_hasher()
+        flags_hasher.update(
+            "\0".join(self._get_link_settings(output_file, output_type)).encode()
+        )
+
+        return {
+            "obj_digest": obj_hasher.hexdigest(),
+            "flags_digest": flags_hasher.hexdigest(),
+        }
+
+    def _stat_build_inputs(self, sources):
+        """
+        Stat every source and every header the last build depended on.
+
+        Args:
+            sources: (source_file, stat, file_type) tuples from the source walk
+
+        Returns:
+            List of (path, size, mtime_ns) tuples, or None if an input is missing
+        """
+        input_stats = []
+        source_paths = set()
+        for source_file, st, _ in sources:
+            if st is None:
+                return None
+            source_paths.add(source_file)
+            input_stats.append((source_file, st.st_size, st.st_mtime_ns))
+
+        # After a successful build, the other fingerprinted files are headers
+        for path in self.build_cache["file_hashes"]:
+            if path not in source_paths:
+                st = self._stat_or_none(path)
+                if st is None:
+                    return None
+                input_stats.append((path, st.st_size, st.st_mtime_ns))
+        return input_stats
+
+    def _get_link_settings(self, output_file, output_type):
+        """List the settings that determine how the output is linked"""
+        settings = [
+            output_type,
+            output_file,
+            self.ld,
+            self.ar,
+            *self._compiler_args["ld"],
+            *self._compiler_args["ar"],
+            *(f"-L{dir}" for dir in self.config.get("lib_dirs", [])),
+            *(f"-l{lib}" for lib in self.config.get("libs", [])),
+        ]
+        return [str(setting) for setting in settings]
+
+    def _get_build_digest(self, input_stats, output_file, output_type):
+        """
+        Fingerprint a whole build, to tell when it would do nothing.
+
+        Covers the size and mtime of every source and header, the compile and
+        link settings, and the output and libraries the link reads.
+
+        Args:
+            input_stats: (path, size, mtime_ns) of every source and header
+            output_file: Path of the executable or library
+            output_type: Configured output type
+
+        Returns:
+            Hex digest, or None if the output doesn't exist
+        """
+        output_stat = self._stat_or_none(output_file)
+        if output_stat is None:
+            return None
+
+        hasher = _new_file_hasher()
+        settings = [
+            self._compile_prefix,
+            self._get_link_settings(output_file, output_type),
+        ]
+        hasher.update(json.dumps(settings).encode())
+        for path, size, mtime_ns in sorted(input_stats):
+            hasher.update(f"{path}\0{size}\0{mtime_ns}\n".encode())
+
+        hasher.update(f"{output_stat.st_size}\0{output_stat.st_mtime_ns}\n".encode())
+        for library_file in self._get_link_library_files():
+            st = self._stat_or_none(library_file)
+            if st is not None:
+                hasher.update(
+                    f"{library_file}\0{st.st_size}\0{st.st_mtime_ns}\n".encode()
+                )
+        return hasher.hexdigest()
+
+    def _get_link_library_files(self):
+        """List library files the link step may read besides the object files"""
+        library_files = []
+
+        # Outputs of subprojects, which are commonly linked into this project
+        for engine in self.subproject_engines.values():
+            if engine is not self and engine.config.get("output"):
+                library_files.append(
+                    os.path.join(engine.project_path, engine.config["output"])
+                )
+
+        # Libraries found through the configured library directories
+        lib_dirs = [
+            os.path.join(self.project_path, dir)
+            for dir in self.config.get("lib_dirs", [])
+        ]
+        for lib in self.config.get("libs", []):
+            for lib_dir in lib_dirs:
+                library_files.append(os.path.join(lib_dir, f"lib{lib}.a"))
+                library_files.append(os.path.join(lib_dir, f"lib{lib}.so"))
+
+        # Files passed to the linker directly through its flags
+        for arg in self._compiler_args["ld"]:
+            if not arg.startswith("-"):
+                library_files.append(os.path.join(self.project_path, arg))
+
+        return library_files
+
+    def _is_link_current(self, link_state, output_file):
+        """Check if the output is still the one produced from the same inputs"""
+        cached = self.build_cache.get("link")
+        if not isinstance(cached, dict):
+            return False
+
+        st = self._stat_or_none(output_file)
+        return (
+            st is not None
+            and cached.get("obj_digest") == link_state["obj_digest"]
+            and cached.get("flags_digest") == link_state["flags_digest"]
+            and cached.get("output_size") == st.st_size
+            and cached.get("output_mtime_ns") == st.st_mtime_ns
+        )
+
+    def _record_link_state(self, link_state, output_file):
+        """Remember the inputs and output of a successful link"""
+        st = self._stat_or_none(output_file)
+        if st is None:
+            return
+
+        entry = dict(link_state, output_size=st.st_size, output_mtime_ns=st.st_mtime_ns)
+        if self.build_cache.get("link") != entry:
+            self.build_cache["link"] = entry
+            self._cache_dirty = True
+
     async def _link_executable(self, obj_files, output_file, silent=False):
         """Link object files into an executable"""
         if not obj_files:
@@ -349,21 +1094,27 @@ class BuildEngine:
 
         # Prepare library flags
         lib_dirs = self.config.get("lib_dirs", [])
-        lib_dir_flags = " ".join(f"-L{dir}" for dir in lib_dirs)
+        lib_dir_args = [f"-L{dir}" for dir in lib_dirs]
 
         libs = self.config.get("libs", [])
-        lib_flags = " ".join(f"-l{lib}" for lib in libs)
+        lib_args = [f"-l{lib}" for lib in libs]
 
         # Get linker flags
-        compiler_flags = self._get_compiler_flags()
-        linker_flags = compiler_flags["ld"]
+        linker_args = self._compiler_args["ld"]
 
         # Use C++ compiler for linking by default, or specified linker
         linker = self.ld
 
         # Construct the linker command
-        obj_files_str = " ".join(obj_files)
-        cmd = f"{linker} {obj_files_str} -o {output_file} {lib_dir_flags} {lib_flags} {linker_flags}"
+        argv = [
+            *shlex.split(linker),
+            *obj_files,
+            "-o",
+            output_file,
+            *lib_dir_args,
+            *lib_args,
+            *linker_args,
+        ]
 
         if not silent:
             # Display linking progress with styled output
@@ -372,26 +1123,15 @@ class BuildEngine:
 
         # Execute the linking command
         try:
-            process = await asyncio.create_subprocess_shell(
-                cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-
-            stdout, stderr = await process.communicate()
-            if process.returncode != 0:
+            returncode, stderr = await self._run_process(argv, silent)
+            if returncode != 0:
                 if stderr:
-                    error_msg = stderr.decode()
+                    error_msg = stderr.decode(errors="replace")
                     error(f"Linking failed:\n{error_msg}", use_box=True)
                 else:
                     error("Linking failed with no error message.", use_box=True)
                 return False
 
-            if not silent and stdout:
-                stdout_str = stdout.decode()
-                if stdout_str.strip():
-                    print(stdout_str)
-
             return True
         except Exception as e:
             error(f"Linking error: {e}", use_box=True)
@@ -404,12 +1144,10 @@ class BuildEngine:
             return False
 
         # Get archiver flags
-        compiler_flags = self._get_compiler_flags()
-        ar_flags = compiler_flags["ar"] or "rcs"
+        ar_args = self._compiler_args["ar"] or ["rcs"]
 
         # Construct the archiver command
-        obj_files_str = " ".join(obj_files)
-        cmd = f"{self.ar} {ar_flags} {output_file} {obj_files_str}"
+        argv = [*shlex.split(self.ar), *ar_args, output_file, *obj_files]
 
         if not silent:
             # Display library creation progress with styled output
@@ -420,16 +1158,10 @@ class BuildEngine:
 
         # Execute the archiver command
         try:
-            process = await asyncio.create_subprocess_shell(
-                cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-
-            stdout, stderr = await process.communicate()
-            if process.returncode != 0:
+            returncode, stderr = await self._run_process(argv, silent)
+            if returncode != 0:
                 if stderr:
-                    error_msg = stderr.decode()
+                    error_msg = stderr.decode(errors="replace")
                     error(f"Library creation failed:\n{error_msg}", use_box=True)
                 else:
                     error(
@@ -437,23 +1169,166 @@ class BuildEngine:
                     )
                 return False
 
-            if not silent and stdout:
-                stdout_str = stdout.decode()
-                if stdout_str.strip():
-                    print(stdout_str)
-
             return True
         except Exception as e:
             error(f"Library creation error: {e}", use_box=True)
             return False
 
-    async def _run_bootstrap(self):
+    def _emit_ninja(self, sources, output_file, output_type):
+        """
+        Write a Ninja build file for the project into the build directory.
+
+        The file is only rewritten when its contents change, so Ninja can tell
+        when nothing about the build graph moved.
+
+        Args:
+            sources: (source_file, stat, file_type) tuples from the source walk
+            output_file: Path of the executable or library
+            output_type: Configured output type
+
+        Returns:
+            Path to the build file
+        """
+        rules = {"c": "cc", "cpp": "cxx", "asm": "as"}
+        lines = [
+            "# Generated by insurgent from project.yaml; do not edit",
+            "ninja_required_version = 1.3",
+            f"builddir = {_ninja_escape(self.build_dir)}",
+            "",
+        ]
+        for file_type, rule in rules.items():
+            prefix = _ninja_command(self._compile_prefix[file_type])
+            lines.append(f"rule {rule}")
+            if file_type in DEPFILE_SOURCE_TYPES:
+                lines += [
+                    f"  command = {prefix} -MMD -MF $out.d $in -o $out",
+                    "  depfile = $out.d",
+                    "  deps = gcc",
+                ]
+            else:
+                lines.append(f"  command = {prefix} $in -o $out")
+            lines += ["  description = Compiling $in", ""]
+
+        if output_type == "library" or output_type == "static_library":
+            ar_args = self._compiler_args["ar"] or ["rcs"]
+            lines += [
+                "rule ar",
+                f"  command = {_ninja_command([*shlex.split(self.ar), *ar_args])}"
+                " $out $in",
+                "  description = Creating library $out",
+                "",
+            ]
+            output_rule = "ar"
+        else:
+            link_args = [
+                *(f"-L{dir}" for dir in self.config.get("lib_dirs", [])),
+                *(f"-l{lib}" for lib in self.config.get("libs", [])),
+                *self._compiler_args["ld"],
+            ]
+            command = f"{_ninja_command(shlex.split(self.ld))} $in -o $out"
+            if link_args:
+                command += f" {_ninja_command(link_args)}"
+            lines += [
+                "rule link",
+                f"  command = {command}",
+                "  description = Linking $out",
+                "",
+            ]
+            output_rule = "link"
+
+        obj_files = []
+        for source_file, _, file_type in sources:
+            obj_file = _ninja_escape(self._get_object_file_path(source_file))
+            obj_files.append(obj_file)
+            lines.append(
+                f"build {obj_file}: {rules[file_type]} {_ninja_escape(source_file)}"
+            )
+
+        # Relink when a library the link reads changes
+        library_files = [
+            _ninja_escape(path)
+            for path in self._get_link_library_files()
+            if os.path.exists(path)
+        ]
+        implicit = f" | {' '.join(library_files)}" if library_files else ""
+        escaped_output = _ninja_escape(output_file)
+        lines += [
+            f"build {escaped_output}: {output_rule} {' '.join(obj_files)}{implicit}",
+            f"default {escaped_output}",
+            "",
+        ]
+
+        ninja_file = os.path.join(self.build_dir, "build.ninja")
+        contents = "\n".join(lines)
+        try:
+            with open(ninja_file, "r", encoding="utf-8") as f:
+                if f.read() == contents:
+                    return ninja_file
+        except OSError:
+            pass
+        os.makedirs(self.build_dir, exist_ok=True)
+        with open(ninja_file, "w", encoding="utf-8") as f:
+            f.write(contents)
+        return ninja_file
+
+    async def _build_with_ninja(
+        self, sources, output_file, output_type, incremental, multi_threaded, silent
+    ):
+        """
+        Build the project by generating a Ninja file and running ninja on it.
+
+        Ninja then handles scheduling, header dependencies and up-to-date
+        checks itself.
+
+        Args:
+            sources: (source_file, stat, file_type) tuples from the source walk
+            output_file: Path of the executable or library
+            output_type: Configured output type
+            incremental: Whether to keep outputs from previous builds
+            multi_threaded: Whether ninja may run several jobs at once
+            silent: Whether to suppress output
+
+        Returns:
+            True if build was successful, False otherwise
+        """
+        ninja_file = self._emit_ninja(sources, output_file, output_type)
+        # Run from the project directory, like direct builds, so relative
+        # include and library directories from project.yaml still resolve
+        ninja = ["ninja", "-f", ninja_file]
+
+        if not incremental:
+            await self._run_process(
+                [*ninja, "-t", "clean"], silent=True, cwd=self.project_path
+            )
+
+        if not silent:
+            info(f"Building {os.path.basename(output_file)} with ninja...")
+        jobs = str(self.jobs if multi_threaded else 1)
+        returncode, output = await self._run_process(
+            [*ninja, "-j", jobs], silent, cwd=self.project_path, capture_stdout=True
+        )
+        if returncode != 0:
+            if output:
+                error_msg = output.decode(errors="replace")
+                error(f"Ninja build failed:\n{error_msg}", use_box=True)
+            else:
+                error("Ninja build failed.", use_box=True)
+            return False
+
+        if self.build_cache.get("output_file") != output_file:
+            self.build_cache["output_file"] = output_file
+            self._cache_dirty = True
+        self._save_build_cache()
+        return True
+
+    async def _run_bootstrap(self, silent=False):
         """Run bootstrap commands if any"""
         bootstrap_commands = self.config.get("bootstrap", [])
         if not bootstrap_commands:
             return True
 
-        info("Running bootstrap commands...", use_box=True)
+        if not silent:
+            info("Running bootstrap commands...", use_box=True)
 
         for cmd in bootstrap_commands:
             try:
@@ -466,20 +1341,16 @@ class BuildEngine:
                 )
 
                 # Display the command
-                print(Text.style(f"$ {cmd}", color="blue"))
+                if not silent:
+                    print(Text.style(f"$ {cmd}", color="blue"))
 
                 # Execute the command
-                process = await asyncio.create_subprocess_shell(
-                    cmd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                    cwd=self.project_path,
+                returncode, stderr = await self._run_process(
+                    cmd, silent, shell=True, cwd=self.project_path
                 )
-
-                stdout, stderr = await process.communicate()
-                if process.returncode != 0:
+                if returncode != 0:
                     if stderr:
-                        error_msg = stderr.decode()
+                        error_msg = stderr.decode(errors="replace")
                         error(f"Bootstrap command failed:\n{error_msg}", use_box=True)
                     else:
                         error(
@@ -488,17 +1359,75 @@ class BuildEngine:
                         )
                     return False
 
-                if stdout:
-                    stdout_str = stdout.decode()
-                    if stdout_str.strip():
-                        print(stdout_str)
-
             except Exception as e:
                 error(f"Bootstrap error: {e}", use_box=True)
                 return False
 
         return True
 
+    async def _build_subprojects(
+        self, component, incremental, multi_threaded, silent, job_semaphore
+    ):
+        """
+        Build the subprojects, concurrently when multi-threaded.
+
+        Subprojects are assumed to be independent of each other; projects whose
+        subprojects must be built in order can set `parallel_subprojects: false`.
+        Concurrent builds share one job semaphore, so the total number of
+        compiler processes stays bounded by the job count.
+
+        Returns:
+            True if all subprojects were built successfully, False otherwise
+        """
+        # The same engine may be reachable under several names
+        engines = {}
+        for name, engine in self.subproject_engines.items():
+            if engine is not self and engine not in engines.values():
+                engines[name] = engine
+
+        async def build_one(name, engine):
+            if not silent:
+                subproject_box = Box(style="light", title="Subproject")
+                subproject_content = [
+                    f"Building subproject: {Text.style(name, color='cyan', bold=True)}"
+                ]
+                for line in subproject_box.draw(subproject_content):
+                    print(line)
+
+            return await engine._build_with_options(
+                component,
+                incremental,
+                multi_threaded,
+                silent,
+                False,
+                job_semaphore=job_semaphore,
+            )
+
+        if multi_threaded and self.config.get("parallel_subprojects", True):
+            results = await asyncio.gather(
+                *(build_one(name, engine) for name, engine in engines.items()),
+                return_exceptions=True,
+            )
+        else:
+            results = []
+            for name, engine in engines.items():
+                results.append(await build_one(name, engine))
+                if not results[-1]:
+                    break
+
+        all_built = True
+        for name, result in zip(engines, results):
+            if isinstance(result, Exception):
+                error(f"Subproject {name} build failed: {result}", use_box=True)
+                all_built = False
+            elif not result:
+                error(f"Subproject {name} build failed!", use_box=True)
+                all_built = False
+            elif not silent:
+                info(f"Subproject {name} built successfully", use_box=True)
+
+        return all_built
+
     async def _build_with_options(
         self,
         component="all",
@@ -506,6 +1435,7 @@ class BuildEngine:
         multi_threaded=True,
         silent=False,
         build_subprojects=True,
+        job_semaphore=None,
     ):
         """
         Build the project with the specified options.
@@ -516,6 +1446,8 @@ class BuildEngine:
             multi_threaded: Whether to use multi-threading
             silent: Whether to suppress output
             build_subprojects: Whether to build subprojects
+            job_semaphore: Semaphore bounding compile jobs across the projects
+                of one build (created here when not given)
 
         Returns:
             True if build was successful, False otherwise
@@ -524,28 +1456,22 @@ class BuildEngine:
             error("No project configuration found!")
             return False
 
+        # Flags are fixed for the duration of a build; the config may have been
+        # replaced since construction, so recompute them once here
+        self._refresh_compiler_flags()
+
+        if job_semaphore is None:
+            job_semaphore = asyncio.Semaphore(self.jobs)
+
         # Build subprojects first if needed
         if build_subprojects and self.subproject_engines:
-            for name, engine in self.subproject_engines.items():
-                if not silent:
-                    subproject_box = Box(style="light", title="Subproject")
-                    subproject_content = [
-                        f"Building subproject: {Text.style(name, color='cyan', bold=True)}"
-                    ]
-                    for line in subproject_box.draw(subproject_content):
-                        print(line)
-
-                success = await engine._build_with_options(
-                    component, incremental, multi_threaded, silent, False
-                )
-                if not success:
-                    error(f"Subproject {name} build failed!", use_box=True)
-                    return False
-                else:
-                    info(f"Subproject {name} built successfully", use_box=True)
+            if not await self._build_subprojects(
+                component, incremental, multi_threaded, silent, job_semaphore
+            ):
+                return False
 
         # Run bootstrap commands if any
-        bootstrap_success = await self._run_bootstrap()
+        bootstrap_success = await self._run_bootstrap(silent)
         if not bootstrap_success:
             return False
 
@@ -557,13 +1483,84 @@ class BuildEngine:
 
         # Make the output path absolute
         output_file = os.path.join(self.project_path, output_file)
+        output_type = self.config.get("type", "executable").lower()
 
-        # Find source files
-        source_files = self._find_source_files()
-        if not source_files:
+        # Walk the sources once, stating each as it is found
+        sources = []
+        for source_file, entry, file_type in self._iter_sources():
+            try:
+                src_stat = entry.stat()
+            except OSError:
+                src_stat = None
+            sources.append((source_file, src_stat, file_type))
+
+        if not sources:
             warning("No source files found for the project!", use_box=True)
             return False
 
+        # Hand the whole build over to ninja when the project asks for it
+        if self.config.get("backend") == "ninja":
+            if shutil.which("ninja"):
+                return await self._build_with_ninja(
+                    sources,
+                    output_file,
+                    output_type,
+                    incremental,
+                    multi_threaded,
+                    silent,
+                )
+            warning("ninja was not found; using the built-in build backend.")
+
+        # An incremental build whose inputs, settings and outputs all match
+        # the last successful build has nothing to do
+        if incremental:
+            input_stats = self._stat_build_inputs(sources)
+            build_digest = input_stats and self._get_build_digest(
+                input_stats, output_file, output_type
+            )
+            if build_digest and build_digest == self.build_cache.get("build_digest"):
+                if not silent:
+                    info(f"{os.path.basename(output_file)} is up to date")
+                return True
+
+        # Find source files and decide which need compiling in a single pass
+        source_files = []
+        obj_files = []
+        obj_dirs = {os.path.dirname(output_file)}
+        files_to_compile = []
+        # Fingerprints of the files being compiled, recorded only on success
+        fingerprints = {}
+        # Headers are usually shared, so each is checked once per build
+        header_state = {}
+
+        for source_file, src_stat, file_type in sources:
+            obj_file = self._get_object_file_path(source_file)
+            source_files.append(source_file)
+            obj_files.append(obj_file)
+
+            changed, fingerprint = self._check_file(source_file, src_stat)
+
+            # Determine if we need to compile this file
+            need_compile = (
+                not incremental or changed or self._stat_or_none(obj_file) is None
+            )
+            if not need_compile and file_type in DEPFILE_SOURCE_TYPES:
+                # Objects without a dependency file predate header tracking
+                deps = self._load_deps(obj_file)
+                need_compile = deps is None or self._deps_changed(deps, header_state)
+
+            if need_compile:
+                obj_dirs.add(os.path.dirname(obj_file))
+                files_to_compile.append((source_file, obj_file, file_type))
+                if fingerprint is not None:
+                    fingerprints[source_file] = fingerprint
+            else:
+                # Contents are unchanged; refresh the size and mtime so the
+                # next build can skip hashing this file again
+                self._record_fingerprint(source_file, fingerprint)
+
+        source_count = len(obj_files)
+
         # Display build summary
         if not silent:
             # Create a table showing the build configuration
@@ -576,7 +1573,7 @@ class BuildEngine:
                 [
                     ["Project", os.path.basename(self.project_path)],
                     ["Output", os.path.basename(output_file)],
-                    ["Sources", str(len(source_files))],
+                    ["Sources", str(source_count)],
                     [
                         "Compiler",
                         (
@@ -599,61 +1596,30 @@ class BuildEngine:
                 print(line)
             print()
 
-        # Determine files that need to be compiled
-        obj_files = []
-        files_to_compile = []
-
-        for source_file in source_files:
-            obj_file = self._get_object_file_path(source_file)
-            obj_files.append(obj_file)
-
-            # Determine if we need to compile this file
-            need_compile = True
-            if incremental and os.path.exists(obj_file):
-                if not self._has_file_changed(source_file):
-                    need_compile = False
-
-            if need_compile:
-                file_type = (
-                    "cpp" if source_file.endswith((".cpp", ".cc", ".cxx")) else "c"
-                )
-                if source_file.endswith((".s", ".asm")):
-                    file_type = "asm"
-                files_to_compile.append((source_file, obj_file, file_type))
-
         # Start build timer
         start_time = time.time()
 
+        # Create the output directory and each object directory once, rather
+        # than once per source file
+        for obj_dir in obj_dirs:
+            os.makedirs(obj_dir, exist_ok=True)
+
         # Compile the files
         if files_to_compile:
             if not silent:
                 compile_box = Box(style="light", title="Compilation")
                 compile_content = [
-                    f"Compiling {Text.style(str(len(files_to_compile)), color='cyan', bold=True)} of {len(source_files)} files..."
+                    f"Compiling {Text.style(str(len(files_to_compile)), color='cyan', bold=True)} of {source_count} files..."
                 ]
                 for line in compile_box.draw(compile_content):
                     print(line)
 
             if multi_threaded:
-                # Compile files in parallel
-                tasks = []
-                for source_file, obj_file, file_type in files_to_compile:
-                    task = asyncio.create_task(
-                        self._compile_file(source_file, obj_file, file_type, silent)
-                    )
-                    tasks.append(task)
-
-                # Wait for all compilation tasks to complete
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-
-                # Check for compilation errors
-                for i, result in enumerate(results):
-                    if isinstance(result, Exception):
-                        error(f"Compilation error: {result}", use_box=True)
-                        return False
-                    elif result is False:
-                        # _compile_file already printed the error
-                        return False
+                # Compile files in parallel, bounded by the job count
+                if not await self._compile_parallel(
+                    files_to_compile, silent, job_semaphore
+                ):
+                    return False
             else:
                 # Compile files sequentially
                 for source_file, obj_file, file_type in files_to_compile:
@@ -663,26 +1629,63 @@ class BuildEngine:
                     if not result:
                         return False
 
-        # Check if any object file is missing (can happen if compilation was aborted)
-        for obj_file in obj_files:
-            if not os.path.exists(obj_file):
-                error(f"Object file {obj_file} is missing!", use_box=True)
-                return False
-
-        # Create the output file (executable or library)
-        output_type = self.config.get("type", "executable").lower()
-        if output_type == "library" or output_type == "static_library":
+            # Every compile succeeded, so the fingerprints taken before
+            # compiling can be recorded without hashing the sources again
+            if fingerprints:
+                self.build_cache["file_hashes"].update(fingerprints)
+                self._cache_dirty = True
+
+            # Fingerprint the headers the new objects were compiled against
+            for _, obj_file, file_type in files_to_compile:
+                if file_type in DEPFILE_SOURCE_TYPES:
+                    for dep in self._load_deps(obj_file) or ():
+                        if dep not in header_state:
+                            header_state[dep] = self._check_file(dep)
+
+        for dep, (_, fingerprint) in header_state.items():
+            self._record_fingerprint(dep, fingerprint)
+        self._prune_fingerprints(source_files, header_state)
+
+        # Create the output file (executable or library), unless nothing
+        # that feeds into it has changed since the last successful link
+        link_state = self._get_link_state(obj_files, output_file, output_type)
+        if link_state and self._is_link_current(link_state, output_file):
+            if not silent:
+                info(f"{os.path.basename(output_file)} is up to date, skipping link")
+            result = True
+        elif output_type == "library" or output_type == "static_library":
             result = await self._create_library(obj_files, output_file, silent)
         else:
             result = await self._link_executable(obj_files, output_file, silent)
 
-        # Save the build cache
-        self._save_build_cache()
+        if result and link_state:
+            self._record_link_state(link_state, output_file)
+
+        # Fingerprint a successful build from the fingerprints taken before
+        # compiling, so files edited while it ran still invalidate it
+        build_digest = None
+        if result:
+            build_digest = self._get_build_digest(
+                [
+                    (path, entry[0], entry[1])
+                    for path, entry in self.build_cache["file_hashes"].items()
+                ],
+                output_file,
+                output_type,
+            )
+        if self.build_cache.get("build_digest") != build_digest:
+            self.build_cache["build_digest"] = build_digest
+            self._cache_dirty = True
 
         # Calculate build time
         build_time = time.time() - start_time
         self.build_cache["last_build_time"] = time.time()
-        self.build_cache["output_file"] = output_file
+        if self.build_cache.get("output_file") != output_file:
+            self.build_cache["output_file"] = output_file
+            self._cache_dirty = True
+
+        # Save the build cache
+        self._save_build_cache()
 
         if result and not silent:
             # Show build success message with styling
@@ -694,7 +1697,7 @@ class BuildEngine:
                 f"Output: {Text.style(output_name, color='green', bold=True)}",
                 f"Size: {Text.style(f'{output_size:.2f} KB', color='cyan')}",
                 f"Time: {Text.style(f'{build_time:.2f} seconds', color='yellow')}",
-                f"Files: {Text.style(str(len(source_files)), color='blue')}",
+                f"Files: {Text.style(str(source_count), color='blue')}",
             ]
             for line in success_box.draw(success_content):
                 print(line)
@@ -743,10 +1746,14 @@ class BuildEngine:
         Returns:
             True if cleaning was successful, False otherwise
         """
+        return self._clean(clean_subprojects)
+
+    def _clean(self, clean_subprojects=True):
+        """Blocking implementation of clean(), for use off the event loop"""
         try:
             # Clean build directory
             if os.path.exists(self.build_dir):
-                shutil.rmtree(self.build_dir)
+                self._discard_build_dir()
                 os.makedirs(self.build_dir, exist_ok=True)
                 info(f"Cleaned build directory: {self.build_dir}")
 
@@ -762,15 +1769,11 @@ class BuildEngine:
             if clean_subprojects and self.subproject_engines:
                 for name, engine in self.subproject_engines.items():
                     info(f"Cleaning subproject: {name}")
-                    await engine.clean(clean_subprojects=False)
+                    engine._clean(clean_subprojects=False)
 
             # Reset build cache
-            self.build_cache = {
-                "file_hashes": {},
-                "last_build_time": 0,
-                "compiler_flags": "",
-                "output_file": "",
-            }
+            self.build_cache = self._new_build_cache()
+            self._cache_dirty = True
             self._save_build_cache()
 
             # Display cleaning summary
@@ -791,6 +1794,43 @@ class BuildEngine:
             error(f"Clean error: {e}", use_box=True)
             return False
 
+    def _discard_build_dir(self):
+        """
+        Remove the build directory without waiting for its contents to be deleted.
+
+        The directory is renamed out of the way, which is a single syscall, and
+        then deleted on a background thread together with any leftovers from
+        earlier interrupted cleans. If the rename fails, it is removed in place.
+        """
+        trash_prefix = f"{os.path.basename(self.build_dir)}.trash."
+        trash_dir = os.path.join(
+            self.project_path, f"{trash_prefix}{os.getpid()}.{time.time_ns()}"
+        )
+        try:
+            os.rename(self.build_dir, trash_dir)
+        except OSError:
+            shutil.rmtree(self.build_dir)
+            return
+
+        trash_dirs = []
+        with os.scandir(self.project_path) as it:
+            for entry in it:
+                if not entry.name.startswith(trash_prefix):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        trash_dirs.append(entry.path)
+                except OSError:
+                    # Already deleted by an earlier clean's background thread
+                    pass
+
+        def remove_trash():
+            for path in trash_dirs:
+                shutil.rmtree(path, ignore_errors=True)
+
+        # Not a daemon thread, so the deletion still completes at interpreter exit
+        threading.Thread(target=remove_trash, name="insurgent-clean").start()
+
     def get_project_info(self):
         """
         Get information about the project.
@@ -1,4 +1,5 @@
 import time
+import traceback
 from insurgent.Logging.logger import error, info, warning, success
 
 class BuildTask:
@@ -6,7 +7,7 @@ class BuildTask:
     Represents a build task to be executed in the build queue.
     """
 
-    def __init__(self, target, action, dependencies=None, project=None):
+    def __init__(self, target, action, dependencies=None, project=None, kind="io"):
         """
         Initialize a build task.
 
@@ -15,11 +16,14 @@ class BuildTask:
             action: Build action to perform
             dependencies: List of dependencies that must be built first
             project: Project this task belongs to
+            kind: "cpu" for CPU-bound actions, which may run in a worker
+                process (the action must then be picklable), or "io"
         """
         self.target = target
         self.action = action
         self.dependencies = dependencies or []
         self.project = project
+        self.kind = kind
         self.completed = False
         self.failed = False
         self.start_time = None
@@ -27,29 +31,37 @@ class BuildTask:
         self.output = []
         self.error = None
 
-    def execute(self):
-        """Execute the build task and update its status."""
-        self.start_time = time.time()
+    def execute(self, process_pool=None):
+        """
+        Execute the build task and update its status.
+
+        Args:
+            process_pool: Executor for CPU-bound tasks, so they don't contend
+                for the GIL; without one they run on the calling thread
+        """
+        # Monotonic nanosecond timestamps, immune to wall-clock adjustments
+        self.start_time = time.perf_counter_ns()
         try:
             # Run the action
-            self.action()
+            if self.kind == "cpu" and process_pool is not None:
+                process_pool.submit(self.action).result()
+            else:
+                self.action()
             self.completed = True
         except Exception as e:
             self.failed = True
             self.error = str(e)
             # Include traceback in the output
-            import traceback
-
             self.output.append(traceback.format_exc())
         finally:
-            self.end_time = time.time()
+            self.end_time = time.perf_counter_ns()
 
     def duration(self):
         """Get the task execution duration in seconds."""
         if self.start_time is None:
             return 0
-        end = self.end_time if self.end_time is not None else time.time()
-        return end - self.start_time
+        end = self.end_time if self.end_time is not None else time.perf_counter_ns()
+        return (end - self.start_time) / 1e9
 
     def __str__(self):
         """Get string representation of the task."""
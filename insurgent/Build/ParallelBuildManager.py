@@ -2,16 +2,18 @@ import asyncio
 import os
 import time
 import threading
-import multiprocessing
-from queue import Queue, Empty
-from concurrent.futures import ThreadPoolExecutor
+import random
+import sys
+from collections import deque
+from queue import Empty, Queue, SimpleQueue
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
 
-from insurgent.Build.BuildEngine import BuildEngine
+from insurgent.Build.BuildEngine import BuildEngine, _available_cpus
 from insurgent.Build.BuildTask import BuildTask
 from insurgent.Build.build import build, clean
 from insurgent.Logging.logger import error, info, warning, success
 from insurgent.TUI.box import Box
-from insurgent.TUI.text import Text
+from insurgent.TUI.text import BOLD, GREEN, RED, RESET, YELLOW
 from insurgent.Shell.Shell import Shell
 
 
@@ -26,24 +28,66 @@ class ParallelBuildManager:
 
         Args:
             project: Project to build
-            max_workers: Maximum number of parallel workers (default: CPU count)
+            max_workers: Maximum number of parallel workers (default: twice the
+                number of usable CPUs)
             verbose: Whether to enable verbose output
         """
         self.project = project
         self.verbose = verbose
         self.tasks = {}
-        self.queue = Queue()
         self.results = Queue()
         self.lock = threading.Lock()
-        self.condition = threading.Condition(self.lock)
+        self.done = threading.Event()
         self.running = False
         self.workers = []
+        self.process_pool = None
 
-        # Determine the number of workers
+        # Determine the number of workers. Threads mostly wait on I/O and
+        # subprocesses, so run two per CPU; CPU-bound tasks get one process
+        # per CPU
+        cpus = _available_cpus()
         if max_workers is None:
-            self.max_workers = multiprocessing.cpu_count()
+            self.max_workers = 2 * cpus
+            max_jobs = os.environ.get("INSURGENT_MAX_JOBS")
+            if max_jobs:
+                try:
+                    self.max_workers = max(1, min(self.max_workers, int(max_jobs)))
+                except ValueError:
+                    warning(f"Ignoring invalid INSURGENT_MAX_JOBS value: {max_jobs}")
         else:
             self.max_workers = max(1, int(max_workers))
+        self.cpu_workers = min(cpus, self.max_workers)
+        if self.verbose:
+            info(
+                f"Using {self.max_workers} build workers, "
+                f"{self.cpu_workers} for CPU-bound tasks"
+            )
+
+        # Each worker owns a ready queue; idle workers steal from their peers
+        self.local_queues = [deque() for _ in range(self.max_workers)]
+        self.queue_locks = [threading.Lock() for _ in range(self.max_workers)]
+        self.work_available = threading.Event()
+
+        # Worker threads are kept alive across builds; each build() bumps the
+        # generation so loops left over from the previous one wind down
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="insurgent-bld"
+        )
+        self.generation = 0
+
+        # Verbose progress lines are written by a single logger thread
+        self.log_queue = SimpleQueue()
+        self.log_thread = None
+        if self.verbose:
+            self.log_thread = threading.Thread(
+                target=self._log_worker, name="insurgent-log", daemon=True
+            )
+            self.log_thread.start()
+
+        # Actions, dependencies and kinds looked up from the project, kept
+        # across builds until the manager is pointed at another project
+        self.target_info = {}
+        self.target_info_project = project
 
         # Task status tracking
         self.pending_tasks = set()
@@ -51,6 +95,10 @@ class ParallelBuildManager:
         self.failed_tasks = set()
         self.running_tasks = set()
 
+        # Dependency graph of the current build
+        self.indegree = {}
+        self.rdeps = {}
+
     def _create_task(self, target):
         """
         Create a build task for the specified target.
@@ -64,114 +112,291 @@ class ParallelBuildManager:
         if target in self.tasks:
             return self.tasks[target]
 
+        if self.target_info_project is not self.project:
+            self.target_info = {}
+            self.target_info_project = self.project
+
         # Get target information from the project
-        action = self.project.get_target_action(target)
-        dependencies = self.project.get_target_dependencies(target)
+        target_info = self.target_info.get(target)
+        if target_info is None:
+            action = self.project.get_target_action(target)
+            dependencies = self.project.get_target_dependencies(target)
+            get_kind = getattr(self.project, "get_target_kind", None)
+            if get_kind:
+                kind = get_kind(target)
+            else:
+                kind = "cpu" if getattr(action, "cpu_bound", False) else "io"
+            target_info = self.target_info[target] = (action, dependencies, kind)
+        action, dependencies, kind = target_info
 
         # Create the task
-        task = BuildTask(target, action, dependencies, self.project)
+        task = BuildTask(target, action, dependencies, self.project, kind)
         self.tasks[target] = task
         return task
 
-    def _process_dependencies(self, target):
+    def _build_dag(self, targets):
         """
-        Process dependencies for a target and add them to the queue.
+        Create tasks for the targets and everything they depend on.
+
+        Fills in the indegree and reverse-dependency maps so finishing a task
+        only has to decrement its dependents' counters. Targets caught in a
+        dependency cycle can never become ready and are marked as failed.
 
         Args:
-            target: Target name to process
+            targets: Target names to build
 
         Returns:
-            List of unresolved dependencies
+            List of targets with no outstanding dependencies
         """
-        task = self._create_task(target)
-        unresolved = []
-
-        for dep in task.dependencies:
-            # Skip already completed dependencies
-            if dep in self.completed_tasks:
-                continue
+        self.indegree = {}
+        self.rdeps = {}
+        frontier = list(dict.fromkeys(targets))
+        seen = set(frontier)
+        while frontier:
+            target = frontier.pop()
+            dependencies = set(self._create_task(target).dependencies)
+            self.indegree[target] = len(dependencies)
+            self.rdeps.setdefault(target, [])
+            for dep in dependencies:
+                self.rdeps.setdefault(dep, []).append(target)
+                if dep not in seen:
+                    seen.add(dep)
+                    frontier.append(dep)
+
+        ready = [target for target, count in self.indegree.items() if count == 0]
+
+        # Walk the graph in topological waves to find targets stuck in cycles
+        remaining = dict(self.indegree)
+        wave = ready
+        while wave:
+            next_wave = []
+            for target in wave:
+                del remaining[target]
+                for dependent in self.rdeps[target]:
+                    remaining[dependent] -= 1
+                    if remaining[dependent] == 0:
+                        next_wave.append(dependent)
+            wave = next_wave
+        for target in remaining:
+            self.tasks[target].failed = True
+            self.tasks[target].error = "Dependency cycle"
+            self.failed_tasks.add(target)
+            if self.verbose:
+                self._report(
+                    f"Skipping {BOLD}{YELLOW}{target}{RESET}: dependency cycle"
+                )
+
+        self.pending_tasks = set(self.indegree) - self.failed_tasks
+        return ready
+
+    def _push(self, target):
+        """
+        Queue a ready target on the worker slot it hashes to.
 
-            # Mark failed dependencies
-            if dep in self.failed_tasks:
-                unresolved.append(dep)
-                continue
+        Args:
+            target: Target name to queue
+        """
+        index = hash(target) % self.max_workers
+        with self.queue_locks[index]:
+            was_empty = not self.local_queues[index]
+            self.local_queues[index].append(target)
+        # Only the first push into an empty queue needs to wake anyone up
+        if was_empty:
+            self.work_available.set()
+
+    def _next_batch(self, index, blocking=False):
+        """
+        Take the next targets for a worker, stealing from a peer if idle.
 
-            # Add dependency to the pending queue if not already there
-            if dep not in self.pending_tasks and dep not in self.running_tasks:
-                self.pending_tasks.add(dep)
-                # Recursively process its dependencies
-                unresolved_deps = self._process_dependencies(dep)
-                if not unresolved_deps:
-                    # If all dependencies are resolved, add to the queue
-                    self.queue.put(dep)
-                else:
-                    unresolved.extend(unresolved_deps)
+        The worker's own queue is drained in one go so a burst of targets
+        made ready by a shared dependency costs a single lock acquisition.
 
-        return unresolved
+        Args:
+            index: Index of the worker's own queue
+            blocking: Whether to wait for busy peers instead of skipping them
 
-    def _worker(self):
-        """Worker thread that processes build tasks from the queue."""
-        while self.running:
+        Returns:
+            List of target names, empty if every queue is empty
+        """
+        with self.queue_locks[index]:
+            if self.local_queues[index]:
+                batch = list(self.local_queues[index])
+                self.local_queues[index].clear()
+                return batch
+
+        peers = [i for i in range(self.max_workers) if i != index]
+        random.shuffle(peers)
+        for peer in peers:
+            # Skip peers that are busy rather than queueing up behind them
+            if not self.queue_locks[peer].acquire(blocking=blocking):
+                continue
             try:
-                # Get a task from the queue with timeout
-                target = self.queue.get(timeout=0.1)
+                if self.local_queues[peer]:
+                    return [self.local_queues[peer].pop()]
+            finally:
+                self.queue_locks[peer].release()
+        return []
 
-                # Skip if the task was already processed
-                if target in self.completed_tasks or target in self.failed_tasks:
-                    self.queue.task_done()
-                    continue
+    def _worker(self, index=0, generation=0):
+        """
+        Worker loop that processes build tasks from the queues.
 
-                # Get the task object
-                task = self.tasks.get(target)
-                if not task:
-                    task = self._create_task(target)
-
-                # Update status
-                with self.lock:
-                    self.pending_tasks.discard(target)
-                    self.running_tasks.add(target)
-
-                # Log start of task
-                if self.verbose:
-                    print(f"Building {Text(target).bold()}")
-
-                # Execute the task
-                task.execute()
-
-                # Update status based on result
-                with self.lock:
-                    self.running_tasks.discard(target)
-                    if task.failed:
-                        self.failed_tasks.add(target)
-                        # Log error
-                        if self.verbose:
-                            print(
-                                f"Failed to build {Text(target).bold().red()}: {task.error}"
-                            )
-                    else:
-                        self.completed_tasks.add(target)
-                        # Log completion
-                        if self.verbose:
-                            duration = task.duration()
-                            print(
-                                f"Built {Text(target).bold().green()} in {duration:.2f}s"
-                            )
-
-                # Add the result to the results queue
-                self.results.put(target)
-
-                # Notify waiting threads
-                with self.condition:
-                    self.condition.notify_all()
-
-                self.queue.task_done()
-
-            except Empty:
-                # No tasks in the queue, check if we should exit
+        Args:
+            index: Index of the worker's own queue
+            generation: Build generation the loop belongs to
+        """
+        while self.running and self.generation == generation:
+            batch = self._next_batch(index)
+            if not batch:
+                # No tasks in the queues, check if we should exit
                 if not self.running or (
                     len(self.pending_tasks) == 0 and len(self.running_tasks) == 0
                 ):
                     break
+                # Re-check every queue after clearing so a concurrent push is
+                # not missed; pushes and the end of the build set the event
+                self.work_available.clear()
+                batch = self._next_batch(index, blocking=True)
+                if not batch:
+                    self.work_available.wait()
+                    continue
+
+            for target in batch:
+                if not self.running:
+                    break
+                self._run_target(target)
+
+    def _run_target(self, target):
+        """
+        Execute a single target and record its outcome.
+
+        Args:
+            target: Target name to build
+        """
+        # Skip if the task was already processed
+        if target in self.completed_tasks or target in self.failed_tasks:
+            return
+
+        # Get the task object
+        task = self.tasks.get(target)
+        if not task:
+            task = self._create_task(target)
+
+        # Update status
+        with self.lock:
+            self.pending_tasks.discard(target)
+            self.running_tasks.add(target)
+
+        # Log start of task
+        if self.verbose:
+            self._report(f"Building {BOLD}{target}{RESET}")
+
+        # Execute the task
+        task.execute(self.process_pool)
+
+        # Update status based on result
+        ready = []
+        skipped = []
+        with self.lock:
+            self.running_tasks.discard(target)
+            if task.failed:
+                self.failed_tasks.add(target)
+                skipped = self._fail_dependents(target)
+            else:
+                self.completed_tasks.add(target)
+                for dependent in self.rdeps.get(target, ()):
+                    self.indegree[dependent] -= 1
+                    if (
+                        self.indegree[dependent] == 0
+                        and dependent not in self.failed_tasks
+                    ):
+                        ready.append(dependent)
+            if not self.pending_tasks and not self.running_tasks:
+                self.done.set()
+
+        for dependent in ready:
+            self._push(dependent)
+
+        # Add the result to the results queue
+        self.results.put(target)
+
+        # Log outside the lock so terminal output doesn't stall other workers
+        if self.verbose:
+            if task.failed:
+                self._report(
+                    f"Failed to build {BOLD}{RED}{target}{RESET}: {task.error}"
+                )
+                for dependent, dep in skipped:
+                    self._report(
+                        f"Skipping {BOLD}{YELLOW}{dependent}{RESET}: "
+                        f"dependency {BOLD}{RED}{dep}{RESET} failed"
+                    )
+            else:
+                duration = task.duration()
+                self._report(f"Built {BOLD}{GREEN}{target}{RESET} in {duration:.2f}s")
+
+    def _fail_dependents(self, target):
+        """
+        Mark everything that depends on a failed target as failed.
+
+        Must be called with the lock held.
+
+        Args:
+            target: Target name that failed
+
+        Returns:
+            List of (dependent, failed dependency) pairs that were skipped
+        """
+        skipped = []
+        stack = [target]
+        while stack:
+            dep = stack.pop()
+            for dependent in self.rdeps.get(dep, ()):
+                if dependent in self.failed_tasks:
+                    continue
+                self.pending_tasks.discard(dependent)
+                self.failed_tasks.add(dependent)
+                skipped.append((dependent, dep))
+                stack.append(dependent)
+        return skipped
+
+    def _report(self, message):
+        """
+        Hand a progress line to the logger thread.
+
+        Args:
+            message: Line to print
+        """
+        self.log_queue.put(f"{message}\n")
+
+    def _log_worker(self):
+        """Logger thread that writes queued progress lines in batches."""
+        while True:
+            batch = [self.log_queue.get()]
+            while True:
+                try:
+                    batch.append(self.log_queue.get_nowait())
+                except Empty:
+                    break
+
+            # Events are flush markers and None asks the thread to stop
+            lines = [item for item in batch if isinstance(item, str)]
+            if lines:
+                sys.stdout.write("".join(lines))
+                sys.stdout.flush()
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if None in batch:
+                return
+
+    def _flush_log(self):
+        """Wait until the logger thread has written every queued line."""
+        if self.log_thread is None or not self.log_thread.is_alive():
+            return
+        flushed = threading.Event()
+        self.log_queue.put(flushed)
+        flushed.wait()
 
     def build(self, targets):
         """
@@ -195,83 +420,73 @@ class ParallelBuildManager:
         self.completed_tasks = set()
         self.failed_tasks = set()
         self.running_tasks = set()
+        self.results = Queue()
 
-        while not self.queue.empty():
-            try:
-                self.queue.get_nowait()
-                self.queue.task_done()
-            except Empty:
-                break
+        for local_queue in self.local_queues:
+            local_queue.clear()
+        self.work_available.clear()
+        self.done.clear()
 
-        while not self.results.empty():
-            try:
-                self.results.get_nowait()
-                self.results.task_done()
-            except Empty:
-                break
-
-        # Process targets and their dependencies
-        for target in targets:
-            self.pending_tasks.add(target)
-            unresolved = self._process_dependencies(target)
-            if not unresolved:
-                self.queue.put(target)
+        # Resolve the dependency graph and queue everything that is ready
+        for target in self._build_dag(targets):
+            self._push(target)
+        if not self.pending_tasks:
+            self.done.set()
+
+        # CPU-bound tasks run in worker processes to sidestep the GIL
+        if any(task.kind == "cpu" for task in self.tasks.values()):
+            self.process_pool = ProcessPoolExecutor(max_workers=self.cpu_workers)
 
         # Start worker threads
-        self.workers = []
-        for _ in range(self.max_workers):
-            thread = threading.Thread(target=self._worker)
-            thread.daemon = True
-            thread.start()
-            self.workers.append(thread)
+        self.generation += 1
+        self.workers = [
+            self.executor.submit(self._worker, index, self.generation)
+            for index in range(self.max_workers)
+        ]
 
         # Wait for all tasks to complete
         try:
-            while self.running and (
-                len(self.running_tasks) > 0 or len(self.pending_tasks) > 0
-            ):
-                with self.condition:
-                    # Wait for a notification or timeout
-                    self.condition.wait(0.1)
-
-                # Check for failed tasks that might block the queue
-                if len(self.failed_tasks) > 0 and len(self.pending_tasks) > 0:
-                    # Check if pending tasks are blocked by failures
-                    blocked = False
-                    for target in list(self.pending_tasks):
-                        task = self.tasks.get(target)
-                        if not task:
-                            continue
-
-                        for dep in task.dependencies:
-                            if dep in self.failed_tasks:
-                                blocked = True
-                                self.pending_tasks.discard(target)
-                                self.failed_tasks.add(target)
-                                # Log dependency failure
-                                if self.verbose:
-                                    print(
-                                        f"Skipping {Text(target).bold().yellow()}: "
-                                        f"dependency {Text(dep).bold().red()} failed"
-                                    )
-
-                    if blocked:
-                        # Notify waiting threads about the status change
-                        with self.condition:
-                            self.condition.notify_all()
+            self.done.wait()
         finally:
-            # Stop all workers
+            # Stop all workers, waking the idle ones so they can exit
             self.running = False
+            self.work_available.set()
 
-            # Wait for all workers to finish
-            for thread in self.workers:
-                thread.join(0.1)
+            # Wait for all workers to finish; they exit as soon as their
+            # current task, if any, is done
+            wait(self.workers)
 
             self.workers = []
 
+            if self.process_pool is not None:
+                if sys.version_info >= (3, 9):
+                    self.process_pool.shutdown(wait=False, cancel_futures=True)
+                else:
+                    # 3.8 has no cancel_futures, and a non-waiting shutdown
+                    # races its queue management thread. The workers have
+                    # all returned, so nothing is left to wait for anyway.
+                    self.process_pool.shutdown(wait=True)
+                self.process_pool = None
+
+            self._flush_log()
+
         # Return success status
         return len(self.failed_tasks) == 0
 
+    def close(self):
+        """Shut down the worker threads kept alive between builds."""
+        self.running = False
+        self.work_available.set()
+        self.executor.shutdown(wait=True)
+        if self.log_thread is not None:
+            self.log_queue.put(None)
+            self.log_thread.join()
+            self.log_thread = None
+
+    def forget_targets(self):
+        """Drop cached target information, e.g. after the project changed."""
+        self.target_info = {}
+
     def get_failed_targets(self):
         """Get the list of failed targets."""
         return list(self.failed_tasks)
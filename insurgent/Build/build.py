@@ -2,11 +2,54 @@ import asyncio
 import datetime
 import os
 import subprocess
+import threading
 import time
 
 from insurgent.Build.BuildEngine import BuildEngine
 from insurgent.Logging.logger import *
-from insurgent.Meta.config import load_config
+
+# Event loop shared by every build()/clean() call, running on its own thread
+_LOOP = None
+_LOOP_THREAD = None
+_LOOP_LOCK = threading.Lock()
+
+
+def _get_loop():
+    """Return the shared build event loop, starting it on first use"""
+    global _LOOP, _LOOP_THREAD
+    with _LOOP_LOCK:
+        if _LOOP is None or not _LOOP_THREAD.is_alive():
+            _LOOP = asyncio.new_event_loop()
+            _LOOP_THREAD = threading.Thread(
+                target=_LOOP.run_forever, name="insurgent-loop", daemon=True
+            )
+            _LOOP_THREAD.start()
+        return _LOOP
+
+
+def _run(coro):
+    """
+    Run a coroutine on the shared build event loop and wait for its result.
+
+    Args:
+        coro: Coroutine object
+
+    Returns:
+        Result from coroutine execution
+    """
+    loop = _get_loop()
+    if threading.current_thread() is _LOOP_THREAD:
+        coro.close()
+        # Blocking here would wait on the very loop that has to run the coroutine
+        raise RuntimeError("cannot block on the build event loop from within it")
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    try:
+        return future.result()
+    except BaseException:
+        # E.g. Ctrl-C in the caller: stop the coroutine too, so its
+        # subprocesses are killed instead of outliving the interrupted call
+        future.cancel()
+        raise
 
 
 async def _build_async(
@@ -64,7 +107,7 @@ def build(project, config=None, options=None):
     Returns:
         True if build successful, None if failed
     """
-    options = options or []
+    options = frozenset(options or ())
     incremental = "--incremental" in options
     silent = "--silent" in options
     verbose = "--verbose" in options
@@ -82,55 +125,58 @@ def build(project, config=None, options=None):
             # Project is a name, we need to create a BuildEngine
             project_dir = os.getcwd()
 
+            # Without an explicit config the engine loads project.yaml itself,
+            # reusing its parsed copy for as long as the file is unchanged
             if config is None:
                 # Try to find project.yaml in current directory
                 config_path = os.path.join(project_dir, "project.yaml")
-                if os.path.exists(config_path):
-                    config = load_config(config_path)
-                else:
+                if not os.path.exists(config_path):
                     # If we don't find one in the current directory,
                     # check if this is a sources directory with a parent containing project.yaml
                     parent_dir = os.path.dirname(project_dir)
                     parent_config_path = os.path.join(parent_dir, "project.yaml")
-                    if (
-                        os.path.exists(parent_config_path)
-                        and os.path.basename(project_dir) == "sources"
+                    if os.path.basename(project_dir) == "sources" and os.path.exists(
+                        parent_config_path
                     ):
                         info(f"Found project.yaml in parent directory {parent_dir}")
                         project_dir = parent_dir
-                        config = load_config(parent_config_path)
                     else:
                         error(f"No configuration provided for project: {project}")
                         return None
 
-            engine = BuildEngine(project_dir)
-            if config:
-                engine.config = config  # Use provided config
+            engine = BuildEngine(project_dir, config)
             component = project
 
         if verbose:
-            project_info = engine.get_project_info()
-            log(f"Building project: {project_info['name']} v{project_info['version']}")
-            if "description" in project_info:
-                log(f"Description: {project_info.get('description', 'No description')}")
-            if "authors" in project_info and project_info["authors"]:
-                if isinstance(project_info["authors"], list):
-                    log(f"Authors: {', '.join(project_info['authors'])}")
+            # Read the config directly; get_project_info() also walks the sources
+            project_config = engine.config or {}
+            name = project_config.get("project") or os.path.basename(
+                engine.project_path
+            )
+            log(f"Building project: {name} v{project_config.get('version', '0.1.0')}")
+            description = project_config.get("description")
+            if description:
+                log(f"Description: {description}")
+            authors = project_config.get("authors")
+            if authors:
+                if isinstance(authors, list):
+                    log(f"Authors: {', '.join(authors)}")
                 else:
-                    log(f"Author: {project_info['authors']}")
-            if "license" in project_info and project_info["license"]:
-                log(f"License: {project_info['license']}")
+                    log(f"Author: {authors}")
+            license_name = project_config.get("license")
+            if license_name:
+                log(f"License: {license_name}")
             log(
-                f"Language: {project_info['language']}, Compiler: {project_info['compiler']}"
+                f"Language: {project_config.get('language', 'c++')}, Compiler: {engine.cxx_compiler}"
             )
-            log(f"Output: {project_info['output']}")
-            if "subprojects" in project_info and project_info["subprojects"]:
-                log(f"Subprojects: {', '.join(project_info['subprojects'])}")
+            log(f"Output: {project_config.get('output', '')}")
+            subprojects = project_config.get("subprojects")
+            if subprojects:
+                log(f"Subprojects: {', '.join(map(str, subprojects))}")
 
-        # Create an event loop and run the coroutine
+        # Run the coroutine on the shared event loop
         try:
-            # Use asyncio.run for Python 3.7+ to properly manage the event loop
-            result = asyncio.run(
+            result = _run(
                 _build_async(
                     engine,
                     component,
@@ -197,14 +243,11 @@ def clean(project=None, config=None, options=None):
             engine = project
         else:
             project_dir = os.getcwd()
-            engine = BuildEngine(project_dir)
-            if config:
-                engine.config = config
+            engine = BuildEngine(project_dir, config)
 
-        # Create an event loop and run the coroutine
+        # Run the coroutine on the shared event loop
         try:
-            # Use asyncio.run for Python 3.7+ to properly manage the event loop
-            result = asyncio.run(
+            result = _run(
                 _clean_async(
                     engine,
                     clean_subprojects=not no_subprojects,  # Clean subprojects unless explicitly disabled
@@ -243,14 +286,12 @@ def build_src_tree(args=None):
 
     # Try to find project.yaml
     config_path = os.path.join(project_dir, "project.yaml")
-    if os.path.exists(config_path):
-        config = load_config(config_path)
-    else:
+    if not os.path.exists(config_path):
         error("No project.yaml found in current directory")
         return False
 
-    # Build the project
-    result = build("all", config, options)
+    # Build the project; the engine loads project.yaml from the current directory
+    result = build("all", None, options)
 
     return result is True
 
@@ -267,22 +308,10 @@ def _ensure_coroutine_awaited(coro):
     Returns:
         Result from coroutine execution
     """
-    import asyncio
-
     # If the coroutine is already a result (not a coroutine), return it
     if not asyncio.iscoroutine(coro):
         return coro
 
-    # Try to use asyncio.run which handles the event loop properly
-    try:
-        return asyncio.run(coro)
-    except (RuntimeError, ValueError):
-        # If we're already in an event loop or there's an issue,
-        # create a new loop in this thread and run it
-        loop = asyncio.new_event_loop()
-        try:
-            asyncio.set_event_loop(loop)
-            return loop.run_until_complete(coro)
-        finally:
-            loop.close()
-            asyncio.set_event_loop(None)
+    # The shared loop runs on its own thread, so this works from inside
+    # another running event loop as well
+    return _run(coro)
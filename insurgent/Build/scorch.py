@@ -1,12 +1,13 @@
 import asyncio
 import os
+import threading
+from collections import deque
 from pathlib import Path
 
-from insurgent.Build.build import clean
+from insurgent.Build.build import _run, clean
 from insurgent.Build.BuildEngine import BuildEngine
 from insurgent.Logging.logger import error, log
 from insurgent.Logging.terminal import *
-from insurgent.Meta.config import load_config
 
 
 def scorch_src_tree(options=None):
@@ -25,17 +26,9 @@ def scorch_src_tree(options=None):
     if verbose:
         log(f"{YELLOW}✦ Scorching source tree{RESET}")
 
-    # Get the current directory to clean
-    project_dir = os.getcwd()
-    config_path = os.path.join(project_dir, "project.yaml")
-
-    # Try to load config if it exists
-    config = None
-    if os.path.exists(config_path):
-        config = load_config(config_path)
-
-    # Run the clean operation using the BuildEngine
-    clean_result = clean(config=config, options=options)
+    # Run the clean operation using the BuildEngine; it loads project.yaml
+    # from the current directory itself and reuses the parsed copy
+    clean_result = clean(options=options)
 
     if clean_result:
         if verbose:
@@ -46,6 +39,48 @@ def scorch_src_tree(options=None):
         return False
 
 
+# Directories that never hold projects of their own but can be huge
+_PRUNE = frozenset({"node_modules", "build", "dist", "target", "__pycache__"})
+
+
+def _find_projects(root, nested=True):
+    """
+    Find every directory under root that contains a project.yaml.
+
+    Hidden directories (.git, .venv, caches) and the names in _PRUNE are
+    not searched.
+
+    Args:
+        root: Directory to search
+        nested: Whether to keep searching inside a project directory
+
+    Yields:
+        Paths of project directories, breadth first
+    """
+    pending = deque([root])
+    while pending:
+        directory = pending.popleft()
+        is_project = False
+        subdirs = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    name = entry.name
+                    # DirEntry caches the file type, so this costs no stat()
+                    if entry.is_dir(follow_symlinks=False):
+                        if name not in _PRUNE and not name.startswith("."):
+                            subdirs.append(entry.path)
+                    elif name == "project.yaml" and entry.is_file():
+                        is_project = True
+        except OSError:
+            continue
+        if is_project:
+            yield directory
+            if not nested:
+                continue
+        pending.extend(subdirs)
+
+
 async def scorch_all(projects_dir=None, options=None):
     """
     Clean multiple projects in a directory.
@@ -66,43 +101,54 @@ async def scorch_all(projects_dir=None, options=None):
     if verbose:
         log(f"{YELLOW}✦ Scorching all projects in {projects_dir}{RESET}")
 
-    # Find all subdirectories with project.yaml files
-    projects = []
-    for root, dirs, files in os.walk(projects_dir):
-        if "project.yaml" in files:
-            projects.append(root)
+    # Find all subdirectories with project.yaml files. With --no-nested the
+    # search stops at each project; its subprojects are cleaned through it
+    nested = "--no-nested" not in options
+    projects = list(_find_projects(projects_dir, nested=nested))
 
     if not projects:
         error(f"No projects found in {projects_dir}")
         return False
 
-    success = True
-    for project_path in projects:
-        # Save current directory
-        old_cwd = os.getcwd()
-
-        try:
-            # Change to project directory
-            os.chdir(project_path)
-
-            if verbose:
-                log(
-                    f"{YELLOW}Cleaning project: {os.path.basename(project_path)}{RESET}"
-                )
-
-            # Create a BuildEngine for this project
-            engine = BuildEngine(project_path)
-
-            # Run clean operation
-            clean_result = await engine.clean(clean_subprojects=True)
+    # Projects found directly and as another project's subproject are only
+    # cleaned once
+    claimed = set()
+    claimed_lock = threading.Lock()
 
-            if not clean_result:
-                error(f"Failed to clean project: {os.path.basename(project_path)}")
-                success = False
+    def _clean_one(project_path):
+        if verbose:
+            log(f"{YELLOW}Cleaning project: {os.path.basename(project_path)}{RESET}")
+
+        # Engines work with absolute paths, so no chdir() is needed
+        engine = BuildEngine(project_path)
+        success = True
+        for target in (engine, *engine.subproject_engines.values()):
+            key = os.path.realpath(target.project_path)
+            with claimed_lock:
+                if key in claimed:
+                    continue
+                claimed.add(key)
+            success = target._clean(clean_subprojects=False) and success
+        return success
+
+    # Cleaning blocks on the filesystem, so cleans only overlap on executor
+    # threads; the default executor also bounds how many run at once
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(
+        *(loop.run_in_executor(None, _clean_one, path) for path in projects),
+        return_exceptions=True,
+    )
 
-        finally:
-            # Restore original directory
-            os.chdir(old_cwd)
+    success = True
+    for project_path, clean_result in zip(projects, results):
+        if isinstance(clean_result, Exception):
+            error(
+                f"Failed to clean project: {os.path.basename(project_path)}: {clean_result}"
+            )
+            success = False
+        elif not clean_result:
+            error(f"Failed to clean project: {os.path.basename(project_path)}")
+            success = False
 
     if success and verbose:
         log(f"{GREEN}✔ Successfully scorched all projects{RESET}")
@@ -121,15 +167,5 @@ def scorch_all_sync(projects_dir=None, options=None):
     Returns:
         True if all projects were cleaned successfully, False otherwise
     """
-    # Create an event loop and run the coroutine
-    loop = asyncio.get_event_loop()
-    if loop.is_closed():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-    try:
-        result = loop.run_until_complete(scorch_all(projects_dir, options))
-        return result
-    finally:
-        if not loop.is_closed():
-            loop.close()
+    # Reuse the shared build loop rather than creating and closing one per call
+    return _run(scorch_all(projects_dir, options))
@@ -1,28 +1,45 @@
 import asyncio
+import functools
+import hashlib
 import os
 import platform
+import shlex
 import shutil
 import subprocess
 import sys
-import tempfile
+import tarfile
+import urllib.request
+from collections import deque
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, List, Optional, Tuple
 
+from insurgent.Build.BuildEngine import _available_cpus
 from insurgent.Logging.logger import error, log
 from insurgent.Logging.terminal import *
 
 # Define default paths
-DEFAULT_TOOLCHAIN_DIR = os.path.join(os.path.expanduser("~"), ".insurgent", "toolchain")
-DEFAULT_BUILD_DIR = os.path.join(os.path.expanduser("~"), ".insurgent", "build")
+_HOME = os.path.expanduser("~")
+DEFAULT_TOOLCHAIN_DIR = os.path.join(_HOME, ".insurgent", "toolchain")
+DEFAULT_BUILD_DIR = os.path.join(_HOME, ".insurgent", "build")
+
+# Resolved once; platform.system() may shell out to uname
+_SYSTEM = platform.system()
 
 # Define installation directories based on platform
-if platform.system() == "Windows":
+if _SYSTEM == "Windows":
     DEFAULT_INSTALL_DIR = os.path.expandvars("%LOCALAPPDATA%\\InsurgeNT\\toolchain")
-elif platform.system() == "Darwin":  # macOS
+elif _SYSTEM == "Darwin":  # macOS
     DEFAULT_INSTALL_DIR = "/usr/local/bin"
 else:  # Linux and others
     DEFAULT_INSTALL_DIR = "/usr/local/bin"
 
+# Chunk size used when streaming downloads to disk
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+# Longest single output line accepted from a build command
+STREAM_LIMIT = 1 << 20
+# Lines of command output kept for error reports
+OUTPUT_TAIL_LINES = 200
+
 # Supported toolchains and versions
 SUPPORTED_TOOLCHAINS = {
     "gcc": {
@@ -40,6 +57,180 @@ SUPPORTED_TOOLCHAINS = {
 }
 
 
+@functools.lru_cache(maxsize=32)
+def _which_on_path(name: str, path: Optional[str]) -> Optional[str]:
+    """Cached shutil.which() for a given PATH value"""
+    return shutil.which(name, path=path)
+
+
+def _which(name: str) -> Optional[str]:
+    """
+    Locate an executable, caching the lookup until PATH changes.
+
+    Args:
+        name: Executable name
+
+    Returns:
+        Full path to the executable, or None if it is not on PATH
+    """
+    return _which_on_path(name, os.environ.get("PATH"))
+
+
+@functools.lru_cache(maxsize=8)
+def _probe_version(compiler: str, path: Optional[str]) -> Optional[str]:
+    """
+    Get the first line of `compiler --version`.
+
+    Args:
+        compiler: Compiler executable
+        path: PATH value the compiler is resolved against; part of the cache key
+
+    Returns:
+        Version line, or None if the compiler can't be run
+    """
+    try:
+        output = subprocess.check_output(
+            [compiler, "--version"], text=True, stderr=subprocess.DEVNULL
+        )
+    except (subprocess.SubprocessError, OSError):
+        return None
+    return output.split("\n", 1)[0]
+
+
+@functools.lru_cache(maxsize=8)
+def _detect_toolchain(path: Optional[str]) -> Tuple[str, Optional[str]]:
+    """
+    Find the first supported toolchain that runs, remembering misses too.
+
+    Args:
+        path: PATH value to search
+
+    Returns:
+        Tuple of (toolchain name, version line), or ("", None) if none found
+    """
+    for compiler in SUPPORTED_TOOLCHAINS.keys():
+        # Only probe compilers that are actually on PATH
+        if _which_on_path(compiler, path) is None:
+            continue
+        version = _probe_version(compiler, path)
+        if version is not None:
+            return compiler, version
+    return "", None
+
+
+def _download(url: str, dest: str) -> None:
+    """
+    Download a URL to a file, streaming it in large chunks.
+
+    Args:
+        url: URL to download; redirects are followed
+        dest: Path of the file to write
+    """
+    with urllib.request.urlopen(url) as response, open(dest, "wb") as f:
+        shutil.copyfileobj(response, f, DOWNLOAD_CHUNK_SIZE)
+
+
+def _sha256_file(path: str) -> str:
+    """
+    Hash a file with SHA-256, reading it in large chunks.
+
+    Args:
+        path: File to hash
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _is_cached_archive(path: str, expected: Optional[str] = None) -> bool:
+    """
+    Check whether a cached archive is intact.
+
+    Args:
+        path: Cached archive path; its digest is stored alongside in path.sha256
+        expected: Known digest for the archive, if any
+
+    Returns:
+        True if the archive matches its recorded (or expected) digest
+    """
+    try:
+        with open(path + ".sha256", "r", encoding="utf-8") as f:
+            recorded = f.read().strip()
+    except OSError:
+        return False
+    if expected and recorded != expected:
+        return False
+    try:
+        return _sha256_file(path) == recorded
+    except OSError:
+        return False
+
+
+def _download_to_cache(url: str, path: str, expected: Optional[str] = None) -> None:
+    """
+    Download an archive into the cache, recording its digest.
+
+    Args:
+        url: URL to download
+        path: Cached archive path
+        expected: Known digest for the archive, if any
+
+    Raises:
+        ValueError: If the download doesn't match the expected digest
+    """
+    partial = path + ".part"
+    try:
+        _download(url, partial)
+        digest = _sha256_file(partial)
+        if expected and digest != expected:
+            raise ValueError(f"checksum mismatch (expected {expected}, got {digest})")
+        # Only complete, verified archives ever appear under the final name
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    with open(path + ".sha256", "w", encoding="utf-8") as f:
+        f.write(digest + "\n")
+
+
+def _is_up_to_date(output: str, source: str) -> bool:
+    """
+    Check whether a generated file is newer than the file it came from.
+
+    Args:
+        output: Generated file, e.g. a Makefile written by configure
+        source: Input it was generated from
+
+    Returns:
+        True if output exists and is newer than source
+    """
+    try:
+        return os.stat(output).st_mtime_ns > os.stat(source).st_mtime_ns
+    except OSError:
+        return False
+
+
+def _extract_archive(archive_path: str, dest_dir: str) -> None:
+    """
+    Extract a tar archive in a single sequential pass.
+
+    Args:
+        archive_path: Path of the (optionally compressed) tarball
+        dest_dir: Directory to extract into
+    """
+    # Stream mode reads the archive front to back without seeking
+    with tarfile.open(archive_path, "r|*") as archive:
+        if hasattr(tarfile, "data_filter"):
+            archive.extractall(dest_dir, filter="data")
+        else:
+            archive.extractall(dest_dir)
+
+
 class ToolchainManager:
     """Manager for downloading, building, and installing compiler toolchains"""
 
@@ -50,6 +241,7 @@ class ToolchainManager:
         build_dir: Optional[str] = None,
         install_dir: Optional[str] = None,
         verbose: bool = False,
+        reconfigure: bool = False,
     ):
         """
         Initialize the toolchain manager.
@@ -60,6 +252,8 @@ class ToolchainManager:
             build_dir: Directory to build the toolchain
             install_dir: Directory to install the toolchain
             verbose: Whether to show verbose output
+            reconfigure: Re-run configure/cmake even if the build directory
+                is already configured
         """
         if toolchain_name not in SUPPORTED_TOOLCHAINS:
             raise ValueError(
@@ -75,11 +269,18 @@ class ToolchainManager:
         self.build_dir = build_dir or os.path.join(DEFAULT_BUILD_DIR, toolchain_name)
         self.install_dir = install_dir or DEFAULT_INSTALL_DIR
         self.verbose = verbose
-
-        # Ensure directories exist
+        self.reconfigure = reconfigure
+        # Directories are created on first use, not for version probes
+        self._dirs_ready = False
+
+    def _ensure_dirs(self) -> None:
+        """Create the toolchain, build and install directories once"""
+        if self._dirs_ready:
+            return
         os.makedirs(self.toolchain_dir, exist_ok=True)
         os.makedirs(self.build_dir, exist_ok=True)
         os.makedirs(os.path.dirname(self.install_dir), exist_ok=True)
+        self._dirs_ready = True
 
     def get_version(self) -> Optional[str]:
         """
@@ -88,64 +289,69 @@ class ToolchainManager:
         Returns:
             Version string if available, None otherwise
         """
-        try:
-            compiler = self.toolchain_name
-            # For clang, use clang++ if checking for C++ compiler
-            if compiler == "clang" and os.path.exists(shutil.which("clang++") or ""):
-                compiler = "clang++"
+        compiler = self.toolchain_name
+        # For clang, use clang++ if checking for C++ compiler
+        if compiler == "clang" and os.path.exists(_which("clang++") or ""):
+            compiler = "clang++"
 
-            output = subprocess.check_output([compiler, "--version"], text=True)
-            return output.split("\n")[0]
-        except (FileNotFoundError, subprocess.CalledProcessError):
-            return None
+        return _probe_version(compiler, os.environ.get("PATH"))
 
     async def run_command(
-        self, cmd: Union[str, List[str]], cwd: Optional[str] = None
+        self,
+        cmd: List[str],
+        cwd: Optional[str] = None,
+        env: Optional[Dict[str, str]] = None,
     ) -> Tuple[bool, str]:
         """
         Run a command asynchronously.
 
         Args:
-            cmd: Command to run (string or list of args)
+            cmd: Command to run as a list of args; no shell is involved
             cwd: Working directory
+            env: Environment for the command; defaults to the current one
 
         Returns:
-            Tuple of (success, output)
+            Tuple of (success, output), where output holds the last
+            OUTPUT_TAIL_LINES lines of combined stdout/stderr
         """
         if self.verbose:
-            if isinstance(cmd, list):
-                log(f"Running: {' '.join(cmd)}")
-            else:
-                log(f"Running: {cmd}")
+            log(f"Running: {shlex.join(cmd)}")
 
         try:
-            if isinstance(cmd, str):
-                # Use shell=True for string commands
-                process = await asyncio.create_subprocess_shell(
-                    cmd,
-                    cwd=cwd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                )
-            else:
-                # Use create_subprocess_exec for list of args
-                process = await asyncio.create_subprocess_exec(
-                    *cmd,
-                    cwd=cwd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                )
-
-            stdout, stderr = await process.communicate()
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                cwd=cwd,
+                env=env,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                limit=STREAM_LIMIT,
+            )
 
-            if process.returncode == 0:
-                if self.verbose and stdout:
-                    log(stdout.decode().strip())
-                return True, stdout.decode().strip()
+            try:
+                # Stream lines as they arrive rather than buffering the whole output
+                tail = deque(maxlen=OUTPUT_TAIL_LINES)
+                async for raw in process.stdout:
+                    line = raw.decode(errors="replace").rstrip()
+                    tail.append(line)
+                    if self.verbose:
+                        log(line)
+
+                returncode = await process.wait()
+            finally:
+                # A failed or cancelled read must not leave the command running
+                if process.returncode is None:
+                    try:
+                        process.kill()
+                    except ProcessLookupError:
+                        pass
+                    await process.wait()
+            output = "\n".join(tail).strip()
+
+            if returncode == 0:
+                return True, output
             else:
-                error_msg = stderr.decode().strip()
-                error(f"Command failed with code {process.returncode}: {error_msg}")
-                return False, error_msg
+                error(f"Command failed with code {returncode}: {output}")
+                return False, output
 
         except Exception as e:
             error(f"Error running command: {e}")
@@ -159,6 +365,7 @@ class ToolchainManager:
             True if successful, False otherwise
         """
         log(f"{YELLOW}Checking for {self.toolchain_name} toolchain sources...{RESET}")
+        self._ensure_dirs()
 
         # Check if sources already exist
         toolchain_src_dir = os.path.join(self.toolchain_dir, self.toolchain_info["dir"])
@@ -168,62 +375,40 @@ class ToolchainManager:
 
         url = self.toolchain_info["url"]
         archive = self.toolchain_info["archive"]
+        expected = self.toolchain_info.get("sha256")
 
-        log(f"{YELLOW}Downloading toolchain from {url}...{RESET}")
-
-        # Create a temporary directory for downloads
-        with tempfile.TemporaryDirectory() as temp_dir:
-            archive_path = os.path.join(temp_dir, archive)
+        # Archives are kept between runs so a failed build doesn't re-download
+        cache_dir = os.path.join(self.toolchain_dir, "_cache")
+        os.makedirs(cache_dir, exist_ok=True)
+        archive_path = os.path.join(cache_dir, archive)
 
-            # Download with curl or wget
-            if shutil.which("curl"):
-                cmd = f"curl -L {url} -o {archive_path}"
-            elif shutil.which("wget"):
-                cmd = f"wget {url} -O {archive_path}"
-            else:
-                error("Neither curl nor wget is installed! Cannot download toolchain.")
-                return False
+        loop = asyncio.get_running_loop()
+        if await loop.run_in_executor(None, _is_cached_archive, archive_path, expected):
+            log(f"{GREEN}Using cached {archive}.{RESET}")
+        else:
+            log(f"{YELLOW}Downloading toolchain from {url}...{RESET}")
 
-            success, _ = await self.run_command(cmd)
-            if not success:
+            # Download in-process on a worker thread so the loop stays free
+            try:
+                await loop.run_in_executor(
+                    None, _download_to_cache, url, archive_path, expected
+                )
+            except (OSError, ValueError) as e:
+                error(f"Failed to download {url}: {e}")
                 return False
 
             log(f"{YELLOW}Download complete. Extracting...{RESET}")
 
-            # Extract the archive
-            if shutil.which("tar"):
-                extract_cmd = f"tar -xf {archive_path} -C {self.toolchain_dir}"
-                success, _ = await self.run_command(extract_cmd)
-                if not success:
-                    return False
-            elif shutil.which("7z"):
-                # 7z requires two steps: extract and move
-                extract_dir = os.path.join(temp_dir, "extract")
-                os.makedirs(extract_dir, exist_ok=True)
-
-                extract_cmd = f"7z x {archive_path} -o{extract_dir}"
-                success, _ = await self.run_command(extract_cmd)
-                if not success:
-                    return False
-
-                # Move extracted directory to toolchain dir
-                src_dir = os.path.join(extract_dir, self.toolchain_info["dir"])
-                dst_dir = os.path.join(self.toolchain_dir, self.toolchain_info["dir"])
-
-                try:
-                    if os.path.exists(src_dir):
-                        shutil.move(src_dir, dst_dir)
-                    else:
-                        # If extracted directory structure is different, move all contents
-                        os.makedirs(dst_dir, exist_ok=True)
-                        for item in os.listdir(extract_dir):
-                            shutil.move(os.path.join(extract_dir, item), dst_dir)
-                except Exception as e:
-                    error(f"Error moving extracted files: {e}")
-                    return False
-            else:
-                error("No extraction tools available! Install 'tar' or '7z'.")
-                return False
+        # Extract the archive
+        try:
+            await loop.run_in_executor(
+                None, _extract_archive, archive_path, self.toolchain_dir
+            )
+        except (OSError, tarfile.TarError) as e:
+            error(f"Failed to extract {archive}: {e}")
+            # Don't leave partial sources behind to be mistaken for a good tree
+            shutil.rmtree(toolchain_src_dir, ignore_errors=True)
+            return False
 
         log(f"{GREEN}Toolchain extracted successfully!{RESET}")
         return True
@@ -238,7 +423,7 @@ class ToolchainManager:
         log(f"{YELLOW}Building {self.toolchain_name} toolchain...{RESET}")
 
         # Ensure build directory exists
-        os.makedirs(self.build_dir, exist_ok=True)
+        self._ensure_dirs()
 
         # Determine source directory
         source_dir = os.path.join(self.toolchain_dir, self.toolchain_info["dir"])
@@ -265,17 +450,33 @@ class ToolchainManager:
         Returns:
             True if successful, False otherwise
         """
-        cpu_count = os.cpu_count() or 4
-
-        # Configure
-        configure_cmd = f"../gcc-{self.toolchain_info['version']}/configure --prefix={self.install_dir} --enable-languages=c,c++ --disable-multilib"
-        success, _ = await self.run_command(configure_cmd, cwd=self.build_dir)
-        if not success:
-            return False
+        jobs = _available_cpus()
+        # Recursive makes spawned by configure and the build inherit this
+        env = {**os.environ, "MAKEFLAGS": f"-j{jobs}"}
+
+        # Configure, unless an earlier run already did
+        configure_script = os.path.join(source_dir, "configure")
+        makefile = os.path.join(self.build_dir, "Makefile")
+        if not self.reconfigure and _is_up_to_date(makefile, configure_script):
+            log(
+                f"{GREEN}Build directory already configured. Skipping configure.{RESET}"
+            )
+        else:
+            configure_cmd = [
+                configure_script,
+                f"--prefix={self.install_dir}",
+                "--enable-languages=c,c++",
+                "--disable-multilib",
+            ]
+            success, _ = await self.run_command(
+                configure_cmd, cwd=self.build_dir, env=env
+            )
+            if not success:
+                return False
 
         # Make
-        make_cmd = f"make -j{cpu_count}"
-        success, _ = await self.run_command(make_cmd, cwd=self.build_dir)
+        make_cmd = ["make", f"-j{jobs}"]
+        success, _ = await self.run_command(make_cmd, cwd=self.build_dir, env=env)
         if not success:
             return False
 
@@ -292,21 +493,43 @@ class ToolchainManager:
         Returns:
             True if successful, False otherwise
         """
-        cpu_count = os.cpu_count() or 4
+        jobs = _available_cpus()
 
         # Create a separate build directory for LLVM
         llvm_build_dir = os.path.join(self.build_dir, "llvm-build")
         os.makedirs(llvm_build_dir, exist_ok=True)
 
-        # Configure with CMake
-        cmake_cmd = f"cmake -G 'Unix Makefiles' -DCMAKE_INSTALL_PREFIX={self.install_dir} -DLLVM_ENABLE_PROJECTS=clang -DCMAKE_BUILD_TYPE=Release {source_dir}/llvm"
-        success, _ = await self.run_command(cmake_cmd, cwd=llvm_build_dir)
-        if not success:
-            return False
+        # Reuse an existing CMake configuration, with the tool it was made for
+        cmake_cache = os.path.join(llvm_build_dir, "CMakeCache.txt")
+        cmake_lists = os.path.join(source_dir, "llvm", "CMakeLists.txt")
+        if not self.reconfigure and _is_up_to_date(cmake_cache, cmake_lists):
+            log(f"{GREEN}Build directory already configured. Skipping CMake.{RESET}")
+            if os.path.exists(os.path.join(llvm_build_dir, "build.ninja")):
+                build_tool = "ninja"
+            else:
+                build_tool = "make"
+        else:
+            # Ninja schedules LLVM's many small targets better than make
+            build_tool = "ninja" if _which("ninja") else "make"
+            generator = "Ninja" if build_tool == "ninja" else "Unix Makefiles"
+
+            # Configure with CMake
+            cmake_cmd = [
+                "cmake",
+                "-G",
+                generator,
+                f"-DCMAKE_INSTALL_PREFIX={self.install_dir}",
+                "-DLLVM_ENABLE_PROJECTS=clang",
+                "-DCMAKE_BUILD_TYPE=Release",
+                os.path.join(source_dir, "llvm"),
+            ]
+            success, _ = await self.run_command(cmake_cmd, cwd=llvm_build_dir)
+            if not success:
+                return False
 
         # Build
-        make_cmd = f"make -j{cpu_count}"
-        success, _ = await self.run_command(make_cmd, cwd=llvm_build_dir)
+        build_cmd = [build_tool, f"-j{jobs}"]
+        success, _ = await self.run_command(build_cmd, cwd=llvm_build_dir)
         if not success:
             return False
 
@@ -321,19 +544,23 @@ class ToolchainManager:
             True if successful, False otherwise
         """
         log(f"{YELLOW}Installing {self.toolchain_name} to {self.install_dir}...{RESET}")
+        self._ensure_dirs()
 
         install_dir = Path(self.install_dir)
 
         if self.toolchain_name == "gcc":
-            install_cmd = "make install"
+            install_cmd = ["make", "install"]
             success, _ = await self.run_command(install_cmd, cwd=self.build_dir)
             if not success:
                 return False
         elif self.toolchain_name == "clang":
-            install_cmd = "make install"
-            success, _ = await self.run_command(
-                install_cmd, cwd=os.path.join(self.build_dir, "llvm-build")
-            )
+            llvm_build_dir = os.path.join(self.build_dir, "llvm-build")
+            # Install with whichever tool the build directory was generated for
+            if os.path.exists(os.path.join(llvm_build_dir, "build.ninja")):
+                install_cmd = ["ninja", "install"]
+            else:
+                install_cmd = ["make", "install"]
+            success, _ = await self.run_command(install_cmd, cwd=llvm_build_dir)
             if not success:
                 return False
         else:
@@ -343,7 +570,7 @@ class ToolchainManager:
         # Check if install directory is in PATH
         path_env = os.environ.get("PATH", "").split(os.pathsep)
         install_bin_dir = str(
-            install_dir / "bin" if platform.system() != "Windows" else install_dir
+            install_dir / "bin" if _SYSTEM != "Windows" else install_dir
         )
 
         if install_bin_dir not in path_env:
@@ -355,7 +582,7 @@ class ToolchainManager:
             )
 
             # Suggest permanent PATH addition based on platform
-            if platform.system() == "Windows":
+            if _SYSTEM == "Windows":
                 log(
                     f"{YELLOW}To permanently add to PATH, run this in PowerShell as Administrator:{RESET}"
                 )
@@ -368,6 +595,11 @@ class ToolchainManager:
                 )
                 log(f'export PATH="{install_bin_dir}:$PATH"')
 
+        # A freshly installed compiler may shadow the one probed before
+        _which_on_path.cache_clear()
+        _probe_version.cache_clear()
+        _detect_toolchain.cache_clear()
+
         log(f"{GREEN}Toolchain installation complete!{RESET}")
         return True
 
@@ -421,17 +653,10 @@ def get_toolchain() -> str:
     Returns:
         Toolchain name or empty string if none found
     """
-    for compiler in SUPPORTED_TOOLCHAINS.keys():
-        # Check for compiler existence in PATH
-        if shutil.which(compiler):
-            try:
-                version = subprocess.check_output(
-                    [compiler, "--version"], text=True
-                ).split("\n")[0]
-                log(f"Detected {compiler}: {version}")
-                return compiler
-            except (subprocess.SubprocessError, OSError):
-                pass
+    compiler, version = _detect_toolchain(os.environ.get("PATH"))
+    if compiler:
+        log(f"Detected {compiler}: {version}")
+        return compiler
 
     log(
         f"{YELLOW}No supported toolchains found. Available toolchains: {', '.join(SUPPORTED_TOOLCHAINS.keys())}{RESET}"
@@ -439,7 +664,9 @@ def get_toolchain() -> str:
     return ""
 
 
-def setup_toolchain(toolchain_name=None, install_dir=None, verbose=False):
+def setup_toolchain(
+    toolchain_name=None, install_dir=None, verbose=False, reconfigure=False
+):
     """
     Synchronous wrapper for setting up a toolchain.
 
@@ -447,6 +674,7 @@ def setup_toolchain(toolchain_name=None, install_dir=None, verbose=False):
         toolchain_name: Name of the toolchain to set up
         install_dir: Directory to install the toolchain
         verbose: Whether to show verbose output
+        reconfigure: Re-run configure/cmake on an already configured build
 
     Returns:
         True if successful, False otherwise
@@ -464,20 +692,14 @@ def setup_toolchain(toolchain_name=None, install_dir=None, verbose=False):
 
     # Create and configure toolchain manager
     manager = ToolchainManager(
-        toolchain_name=toolchain_name, install_dir=install_dir, verbose=verbose
+        toolchain_name=toolchain_name,
+        install_dir=install_dir,
+        verbose=verbose,
+        reconfigure=reconfigure,
     )
 
-    # Create an event loop and run the setup_toolchain coroutine
-    loop = asyncio.get_event_loop()
-    if loop.is_closed():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-    try:
-        return loop.run_until_complete(manager.setup_toolchain())
-    finally:
-        if not loop.is_closed():
-            loop.close()
+    # asyncio.run() owns the loop, leaving the default event loop untouched
+    return asyncio.run(manager.setup_toolchain())
 
 
 # For backwards compatibility
@@ -6,87 +6,169 @@
 Logging utility functions for the InsurgeNT project.
 """
 
-import datetime
+import atexit
+import functools
 import os
+import re
 import sys
+import threading
+import time
 
 from insurgent.Logging.terminal import *
 from insurgent.TUI.text import Text
 from insurgent.TUI.box import Box
 
+# Matches any ANSI escape sequence, including 256-color and truecolor codes
+_ANSI_RE = re.compile(r"\x1B\[[0-?]*[ -/]*[@-~]")
+
+# Build log location, resolved once at import
+_LOG_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "build.log"))
+# Log file handle, opened on first use and kept open for the process lifetime
+_LOG_FILE = None
+_LOG_LOCK = threading.Lock()
+# Size of the log file write buffer
+LOG_BUFFER_SIZE = 64 * 1024
+# (second, formatted timestamp) of the most recent log entry
+_LAST_TIMESTAMP = (None, "")
+
+
+def _timestamp():
+    """Format the current local time, reusing the string within a second"""
+    global _LAST_TIMESTAMP
+    second = int(time.time())
+    cached_second, formatted = _LAST_TIMESTAMP
+    if second != cached_second:
+        formatted = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(second))
+        _LAST_TIMESTAMP = (second, formatted)
+    return formatted
+
+
+def _rotate_log():
+    """Move an existing build log aside to build.log.old, if there's room."""
+    if os.path.exists(_LOG_PATH):
+        try:
+            # Try to rename the existing log file
+            if not os.path.exists(_LOG_PATH + ".old"):
+                os.rename(_LOG_PATH, _LOG_PATH + ".old")
+            else:
+                # If .old already exists, append to the existing log
+                pass
+        except (OSError, IOError):
+            # If rename fails, we'll just append to the existing file
+            pass
+
+
+def _open_log_file():
+    """
+    Open the build log file for appending, rotating an existing log once.
+
+    Returns:
+        The buffered log file handle
+    """
+    _rotate_log()
+
+    # Open in append mode to add new log entries
+    log_file = open(_LOG_PATH, "a", buffering=LOG_BUFFER_SIZE)
+    atexit.register(log_file.close)
+    return log_file
+
 
-def write_to_log_file(message):
+def flush_log_file():
+    """Write any buffered log file entries to disk."""
+    with _LOG_LOCK:
+        if _LOG_FILE is not None:
+            _LOG_FILE.flush()
+
+
+def write_to_log_file(message, flush=False):
     """
     Write a message to the build log file.
 
+    Entries are buffered; they reach the disk when the buffer fills, when
+    flush is requested, or at exit.
+
     Args:
         message: The message to write to the log file
+        flush: Whether to flush the log file after this message
     """
-    log_file_path = os.path.join(os.path.dirname(__file__), "../build.log")
+    global _LOG_FILE
     try:
-        if os.path.exists(log_file_path):
-            try:
-                # Try to rename the existing log file
-                if not os.path.exists(log_file_path + ".old"):
-                    os.rename(log_file_path, log_file_path + ".old")
-                else:
-                    # If .old already exists, append to the existing log
-                    pass
-            except (OSError, IOError):
-                # If rename fails, we'll just append to the existing file
-                pass
-
-        # Open in append mode to add new log entries
-        with open(log_file_path, "a") as f:
-            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            # Strip color codes for log file
-            clean_message = message
-            for color in [
-                RED,
-                GREEN,
-                BLUE,
-                YELLOW,
-                MAGENTA,
-                CYAN,
-                RESET,
-                BOLD,
-                ITALIC,
-                UNDERLINE,
-            ]:
-                clean_message = clean_message.replace(color, "")
-            f.write(f"[{timestamp}] {clean_message}\n")
+        timestamp = _timestamp()
+        # Strip color codes for log file
+        clean_message = _ANSI_RE.sub("", message)
+        with _LOG_LOCK:
+            if _LOG_FILE is None:
+                _LOG_FILE = _open_log_file()
+            _LOG_FILE.write(f"[{timestamp}] {clean_message}\n")
+            if flush:
+                _LOG_FILE.flush()
     except Exception as e:
         print(f"Warning: Could not write to log file: {e}", file=sys.stderr)
 
 
-def log(message, to_stdout=True, use_box=False):
+def _level(tag, color, fallback_color, box_style, box_title):
+    """Build a _LEVELS entry, styling the label once up front"""
+    label = Text.style(tag, color=color, bold=True)
+    return tag, label, fallback_color, box_style, box_title
+
+
+# Per level: (tag, styled label, fallback color, box style, box title)
+_LEVELS = {
+    "BUILD": _level("[BUILD]", "green", GREEN, "light", "Build"),
+    "ERROR": _level("[ERROR]", "red", RED, "heavy", "Error"),
+    "WARNING": _level("[WARNING]", "yellow", YELLOW, "light", "Warning"),
+    "INFO": _level("[INFO]", "blue", BLUE, "light", "Info"),
+    "SUCCESS": _level("[SUCCESS]", "green", GREEN, "light", "Success"),
+}
+
+
+@functools.lru_cache(maxsize=8)
+def _box_for(style, title):
+    """Shared Box for a style and title; drawing doesn't modify it"""
+    return Box(style=style, title=title)
+
+
+def _emit(level, message, use_box=False, to_stdout=True, flush=False):
     """
-    Log a build message.
+    Write a message to the log file and, optionally, to stdout.
 
     Args:
+        level: Key into _LEVELS
         message: The message to log
+        use_box: Whether to display the message in a box
         to_stdout: Whether to print the message to stdout
-        use_box: Whether to display the message in a box (for important messages)
+        flush: Whether to flush the log file after this message
     """
+    tag, label, fallback_color, box_style, box_title = _LEVELS[level]
     try:
-        write_to_log_file(f"[BUILD] {message}")
+        write_to_log_file(f"{tag} {message}", flush=flush)
         if to_stdout:
             if use_box:
-                box = Box(style="light", title="Build")
-                box_lines = box.draw([message])
-                for line in box_lines:
-                    print(line)
+                box_lines = _box_for(box_style, box_title).draw([message])
+                # One write for the whole box rather than one print per line
+                sys.stdout.write("\n".join(box_lines) + "\n")
             else:
-                label = Text.style("[BUILD]", color="green", bold=True)
-                formatted = f"{label} {message}"
-                print(formatted)
+                # A single write with the newline; print() would issue two
+                sys.stdout.write(f"{label} {message}\n")
     except Exception as e:
-        print(f"Warning: Logging error: {e}", file=sys.stderr)
+        print(f"Warning: {box_title} logging error: {e}", file=sys.stderr)
         if to_stdout:
-            formatted = f"{GREEN}[BUILD]{RESET} {message}"
+            formatted = f"{fallback_color}{tag}{RESET} {message}"
             print(formatted)
 
 
+def log(message, to_stdout=True, use_box=False):
+    """
+    Log a build message.
+
+    Args:
+        message: The message to log
+        to_stdout: Whether to print the message to stdout
+        use_box: Whether to display the message in a box (for important messages)
+    """
+    _emit("BUILD", message, use_box, to_stdout)
+
+
 def error(message, use_box=True):
     """
     Log an error message.
@@ -95,21 +177,8 @@ def error(message, use_box=True):
         message: The error message to log
         use_box: Whether to display the message in a box
     """
-    try:
-        write_to_log_file(f"[ERROR] {message}")
-        if use_box:
-            box = Box(style="heavy", title="Error")
-            box_lines = box.draw([message])
-            for line in box_lines:
-                print(line)
-        else:
-            label = Text.style("[ERROR]", color="red", bold=True)
-            formatted = f"{label} {message}"
-            print(formatted)
-    except Exception as e:
-        print(f"Warning: Error logging error: {e}", file=sys.stderr)
-        formatted = f"{RED}[ERROR]{RESET} {message}"
-        print(formatted)
+    # Errors are flushed straight away so they survive a crash
+    _emit("ERROR", message, use_box, flush=True)
 
 
 def warning(message, use_box=False):
@@ -120,21 +189,7 @@ def warning(message, use_box=False):
         message: The warning message to log
         use_box: Whether to display the message in a box
     """
-    try:
-        write_to_log_file(f"[WARNING] {message}")
-        if use_box:
-            box = Box(style="light", title="Warning")
-            box_lines = box.draw([message])
-            for line in box_lines:
-                print(line)
-        else:
-            label = Text.style("[WARNING]", color="yellow", bold=True)
-            formatted = f"{label} {message}"
-            print(formatted)
-    except Exception as e:
-        print(f"Warning: Warning logging error: {e}", file=sys.stderr)
-        formatted = f"{YELLOW}[WARNING]{RESET} {message}"
-        print(formatted)
+    _emit("WARNING", message, use_box)
 
 
 def info(message, use_box=False):
@@ -145,21 +200,7 @@ def info(message, use_box=False):
         message: The info message to log
         use_box: Whether to display the message in a box
     """
-    try:
-        write_to_log_file(f"[INFO] {message}")
-        if use_box:
-            box = Box(style="light", title="Info")
-            box_lines = box.draw([message])
-            for line in box_lines:
-                print(line)
-        else:
-            label = Text.style("[INFO]", color="blue", bold=True)
-            formatted = f"{label} {message}"
-            print(formatted)
-    except Exception as e:
-        print(f"Warning: Info logging error: {e}", file=sys.stderr)
-        formatted = f"{BLUE}[INFO]{RESET} {message}"
-        print(formatted)
+    _emit("INFO", message, use_box)
 
 
 def success(message, use_box=False):
@@ -170,18 +211,4 @@ def success(message, use_box=False):
         message: The success message to log
         use_box: Whether to display the message in a box
     """
-    try:
-        write_to_log_file(f"[SUCCESS] {message}")
-        if use_box:
-            box = Box(style="light", title="Success")
-            box_lines = box.draw([message])
-            for line in box_lines:
-                print(line)
-        else:
-            label = Text.style("[SUCCESS]", color="green", bold=True)
-            formatted = f"{label} {message}"
-            print(formatted)
-    except Exception as e:
-        print(f"Warning: Success logging error: {e}", file=sys.stderr)
-        formatted = f"{GREEN}[SUCCESS]{RESET} {message}"
-        print(formatted)
+    _emit("SUCCESS", message, use_box)
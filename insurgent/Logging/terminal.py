@@ -4,24 +4,44 @@
 
 """
 Terminal color and styling constants.
-Provides basic ANSI color codes and symbols for terminal output.
+Provides basic ANSI color codes and symbols for terminal output. The codes
+are empty strings when stdout is not a terminal, so piped output stays plain.
 """
 
+import sys
+
+
+def _stdout_is_tty():
+    """Check once whether stdout is a terminal that can render colors"""
+    try:
+        return sys.stdout is not None and sys.stdout.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+_COLOR = _stdout_is_tty()
+
+
+def _ansi(code):
+    """ANSI escape for the given SGR code, or "" when stdout isn't a terminal"""
+    return f"\033[{code}m" if _COLOR else ""
+
+
 # Define ANSI color and style codes directly
-RESET = "\033[0m"
-BOLD = "\033[1m"
-ITALIC = "\033[3m"
-UNDERLINE = "\033[4m"
+RESET = _ansi(0)
+BOLD = _ansi(1)
+ITALIC = _ansi(3)
+UNDERLINE = _ansi(4)
 
 # Foreground colors
-FG_BLACK = "\033[30m"
-FG_RED = "\033[31m"
-FG_GREEN = "\033[32m"
-FG_YELLOW = "\033[33m"
-FG_BLUE = "\033[34m"
-FG_MAGENTA = "\033[35m"
-FG_CYAN = "\033[36m"
-FG_WHITE = "\033[37m"
+FG_BLACK = _ansi(30)
+FG_RED = _ansi(31)
+FG_GREEN = _ansi(32)
+FG_YELLOW = _ansi(33)
+FG_BLUE = _ansi(34)
+FG_MAGENTA = _ansi(35)
+FG_CYAN = _ansi(36)
+FG_WHITE = _ansi(37)
 
 # Re-export the standard ANSI color codes with simpler names
 WHITE = FG_WHITE
@@ -31,7 +51,7 @@ RED = FG_RED
 CYAN = FG_CYAN
 BLUE = FG_BLUE
 MAGENTA = FG_MAGENTA
-GRAY = "\033[90m"  # Keep this one as it's not in the TUI Text module
+GRAY = _ansi(90)  # Keep this one as it's not in the TUI Text module
 
 # Common symbols with colors
 CHECK = f"{GREEN}✔{RESET}"
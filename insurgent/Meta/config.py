@@ -1,9 +1,17 @@
 import os
+import threading
 
 import yaml
 
 from insurgent.Logging.logger import error, log
 
+# Prefer the libyaml-backed loader when PyYAML was built against it
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Parsed configs by absolute path, with the (mtime_ns, size) they were read at
+_CONFIG_CACHE = {}
+_CONFIG_CACHE_LOCK = threading.Lock()
+
 MANDATORY_FIELDS = [
     "project",
     "authors",
@@ -32,8 +40,9 @@ def load_config(config_path: str) -> dict:
         return {}
 
     try:
-        with open(config_path, "r", encoding="utf-8") as f:
-            config = yaml.safe_load(f)
+        # Hand raw bytes to the loader so libyaml can do its own decoding
+        with open(config_path, "rb") as f:
+            config = yaml.load(f, Loader=YAML_LOADER)
     except yaml.YAMLError as e:
         error(f"Error parsing YAML file: {e}")
         return {}
@@ -92,6 +101,38 @@ def load_config(config_path: str) -> dict:
     return config
 
 
+def load_config_cached(config_path: str, load=None) -> dict:
+    """
+    Load project configuration, reusing the parsed copy while the file is unchanged
+
+    Args:
+        config_path: Path to the project.yaml file
+        load: Function that loads the configuration on a cache miss,
+            load_config() by default
+
+    Returns:
+        Dictionary with project configuration or empty dict if error
+    """
+    load = load or load_config
+    config_path = os.path.abspath(config_path)
+    try:
+        st = os.stat(config_path)
+    except OSError:
+        return load(config_path)
+
+    key = (st.st_mtime_ns, st.st_size)
+    with _CONFIG_CACHE_LOCK:
+        cached = _CONFIG_CACHE.get(config_path)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    config = load(config_path)
+    if config:
+        with _CONFIG_CACHE_LOCK:
+            _CONFIG_CACHE[config_path] = (key, config)
+    return config
+
+
 def validate_config(config: dict) -> bool:
     """
     Validate if a config dictionary has all required fields and correct types
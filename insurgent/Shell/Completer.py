@@ -2,10 +2,15 @@
 Tab completion for the InsurgeNT Shell.
 """
 
+import bisect
 import os
 import sys
 import re
-from typing import Dict, List, Optional, Callable, Any
+from collections import OrderedDict
+from typing import Dict, List, Optional, Callable, Any, Tuple
+
+# Number of completion contexts kept in Completer.completions_cache
+COMPLETIONS_CACHE_SIZE = 64
 
 
 class Completer:
@@ -22,8 +27,12 @@ class Completer:
             commands: Dictionary of commands available in the shell
         """
         self.commands = commands or {}
-        self.completions_cache = {}
+        self._refresh_commands()
+        # Completions keyed by (line, point), most recently used last
+        self.completions_cache = OrderedDict()
         self.custom_completers = {}
+        # Directory listings keyed by path, with the mtime they were read at
+        self._dir_cache: Dict[str, Tuple[int, List[str]]] = {}
 
     def register_completer(self, command: str, completer: Callable):
         """
@@ -34,6 +43,11 @@ class Completer:
             completer: Function that returns completions for the command
         """
         self.custom_completers[command] = completer
+        self._refresh_commands()
+
+    def _refresh_commands(self):
+        """Rebuild the sorted command names used for prefix lookups"""
+        self._sorted_commands = tuple(sorted(self.commands))
 
     def get_completions(self, line: str, point: int = None) -> List[str]:
         """
@@ -87,9 +101,15 @@ class Completer:
             prefix: Command prefix to complete
 
         Returns:
-            List of matching commands
+            List of matching commands, sorted
         """
-        return [cmd for cmd in self.commands if cmd.startswith(prefix)]
+        # Matches form a contiguous run in the sorted names
+        names = self._sorted_commands
+        start = bisect.bisect_left(names, prefix)
+        end = start
+        while end < len(names) and names[end].startswith(prefix):
+            end += 1
+        return list(names[start:end])
 
     def _complete_path(self, prefix: str) -> List[str]:
         """
@@ -142,18 +162,22 @@ class Completer:
             List of files and directories
         """
         try:
-            items = os.listdir(directory)
-            result = []
-
-            for item in items:
-                full_path = os.path.join(directory, item)
-                if os.path.isdir(full_path):
-                    result.append(f"{item}/")
-                else:
-                    result.append(item)
-
-            return sorted(result)
-        except (FileNotFoundError, PermissionError):
+            # Adding or removing an entry bumps the directory's mtime
+            mtime = os.stat(directory).st_mtime_ns
+            cached = self._dir_cache.get(directory)
+            if cached and cached[0] == mtime:
+                return cached[1]
+
+            # DirEntry knows its file type from the listing, so no stat per entry
+            with os.scandir(directory) as entries:
+                result = sorted(
+                    f"{entry.name}/" if entry.is_dir() else entry.name
+                    for entry in entries
+                )
+
+            self._dir_cache[directory] = (mtime, result)
+            return result
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
             return []
 
     def complete(self, text: str, state: int) -> Optional[str]:
@@ -167,11 +191,41 @@ class Completer:
         Returns:
             Completion string or None if no more completions
         """
-        # Cache completions for performance
-        if text not in self.completions_cache:
-            self.completions_cache[text] = self.get_completions(text)
-
-        completions = self.completions_cache[text]
+        key = self._completion_context(text)
+        # state 0 starts a new completion; later states page through its results
+        if state == 0 or key not in self.completions_cache:
+            self.completions_cache[key] = self.get_completions(*key)
+            if len(self.completions_cache) > COMPLETIONS_CACHE_SIZE:
+                self.completions_cache.popitem(last=False)
+        self.completions_cache.move_to_end(key)
+
+        completions = self.completions_cache[key]
         if state < len(completions):
             return completions[state]
         return None
+
+    @staticmethod
+    def _completion_context(text: str) -> Tuple[str, int]:
+        """
+        Get the line and cursor position a completion request refers to.
+
+        readline only passes the word being completed, so the whole line is
+        read from readline when it is in use.
+
+        Args:
+            text: Text to complete
+
+        Returns:
+            Tuple of (line, point)
+        """
+        try:
+            import readline
+
+            line = readline.get_line_buffer()
+            point = readline.get_endidx()
+        except (ImportError, AttributeError):
+            return text, len(text)
+        if not line[:point].endswith(text):
+            # Not called from readline's completion hook
+            return text, len(text)
+        return line, point
@@ -14,12 +14,11 @@ from insurgent.Build.BuildEngine import BuildEngine
 from insurgent.Build.ParallelBuildManager import ParallelBuildManager
 from insurgent.Logging.logger import error, log, warning
 from insurgent.Logging.terminal import *
-from insurgent.Meta.config import load_config
+from insurgent.Meta.config import load_config_cached
 from insurgent.TUI.box import Box
 from insurgent.TUI.text import Text
 from insurgent.TUI.table import Table
 from insurgent.Meta.version import about as version_about
-from insurgent.Build.build import build as run_build
 
 
 def about(args=None):
@@ -459,20 +458,6 @@ def history(history_obj, history_list, args=None):
     return "\n".join(result)
 
 
-def build(args=None):
-    """
-    Build the project.
-
-    Args:
-        args: Command arguments
-    """
-    try:
-        run_build(args or [])
-        return None
-    except Exception as e:
-        return f"Build error: {str(e)}"
-
-
 def symlink(target, link_name):
     try:
         os.symlink(target, link_name)
@@ -551,7 +536,7 @@ async def build(*args):
     # Try to find config in current directory
     config_path = os.path.join(os.getcwd(), "project.yaml")
     if os.path.exists(config_path):
-        config = load_config(config_path)
+        config = load_config_cached(config_path)
     else:
         # No config found
         error_box = Box(style="heavy", title="Build Error")
@@ -1,48 +1,51 @@
-# ANSI color and style codes
-RESET = "\033[0m"
-BOLD = "\033[1m"
-ITALIC = "\033[3m"
-UNDERLINE = "\033[4m"
-BLINK = "\033[5m"
-REVERSE = "\033[7m"
-HIDDEN = "\033[8m"
-STRIKETHROUGH = "\033[9m"
+from insurgent.Logging.terminal import _ansi
+
+# ANSI color and style codes; empty when stdout isn't a terminal, so
+# styled text stays plain when piped
+RESET = _ansi(0)
+BOLD = _ansi(1)
+ITALIC = _ansi(3)
+UNDERLINE = _ansi(4)
+BLINK = _ansi(5)
+REVERSE = _ansi(7)
+HIDDEN = _ansi(8)
+STRIKETHROUGH = _ansi(9)
 
 # Foreground colors
-BLACK = "\033[30m"
-RED = "\033[31m"
-GREEN = "\033[32m"
-YELLOW = "\033[33m"
-BLUE = "\033[34m"
-MAGENTA = "\033[35m"
-CYAN = "\033[36m"
-WHITE = "\033[37m"
-BRIGHT_BLACK = "\033[90m"
-BRIGHT_RED = "\033[91m"
-BRIGHT_GREEN = "\033[92m"
-BRIGHT_YELLOW = "\033[93m"
-BRIGHT_BLUE = "\033[94m"
-BRIGHT_MAGENTA = "\033[95m"
-BRIGHT_CYAN = "\033[96m"
-BRIGHT_WHITE = "\033[97m"
+BLACK = _ansi(30)
+RED = _ansi(31)
+GREEN = _ansi(32)
+YELLOW = _ansi(33)
+BLUE = _ansi(34)
+MAGENTA = _ansi(35)
+CYAN = _ansi(36)
+WHITE = _ansi(37)
+BRIGHT_BLACK = _ansi(90)
+BRIGHT_RED = _ansi(91)
+BRIGHT_GREEN = _ansi(92)
+BRIGHT_YELLOW = _ansi(93)
+BRIGHT_BLUE = _ansi(94)
+BRIGHT_MAGENTA = _ansi(95)
+BRIGHT_CYAN = _ansi(96)
+BRIGHT_WHITE = _ansi(97)
 
 # Background colors
-BG_BLACK = "\033[40m"
-BG_RED = "\033[41m"
-BG_GREEN = "\033[42m"
-BG_YELLOW = "\033[43m"
-BG_BLUE = "\033[44m"
-BG_MAGENTA = "\033[45m"
-BG_CYAN = "\033[46m"
-BG_WHITE = "\033[47m"
-BG_BRIGHT_BLACK = "\033[100m"
-BG_BRIGHT_RED = "\033[101m"
-BG_BRIGHT_GREEN = "\033[102m"
-BG_BRIGHT_YELLOW = "\033[103m"
-BG_BRIGHT_BLUE = "\033[104m"
-BG_BRIGHT_MAGENTA = "\033[105m"
-BG_BRIGHT_CYAN = "\033[106m"
-BG_BRIGHT_WHITE = "\033[107m"
+BG_BLACK = _ansi(40)
+BG_RED = _ansi(41)
+BG_GREEN = _ansi(42)
+BG_YELLOW = _ansi(43)
+BG_BLUE = _ansi(44)
+BG_MAGENTA = _ansi(45)
+BG_CYAN = _ansi(46)
+BG_WHITE = _ansi(47)
+BG_BRIGHT_BLACK = _ansi(100)
+BG_BRIGHT_RED = _ansi(101)
+BG_BRIGHT_GREEN = _ansi(102)
+BG_BRIGHT_YELLOW = _ansi(103)
+BG_BRIGHT_BLUE = _ansi(104)
+BG_BRIGHT_MAGENTA = _ansi(105)
+BG_BRIGHT_CYAN = _ansi(106)
+BG_BRIGHT_WHITE = _ansi(107)
 
 
 class Text:
@@ -80,7 +83,8 @@ class Text:
             strikethrough: Apply strikethrough
 
         Returns:
-            Styled text with ANSI escape codes
+            Styled text with ANSI escape codes, or plain text when stdout
+            isn't a terminal
         """
         style_codes = []
 
@@ -173,7 +177,7 @@ class Text:
                 style_codes.append(BG_BRIGHT_WHITE)
 
         # Return styled text or original text if no styles applied
-        if style_codes:
+        if any(style_codes):
             styled_text = "".join(style_codes) + str(text) + RESET
             return styled_text
         return str(text)
@@ -1,9 +1,12 @@
+import io
 import os
 import sys
 import unittest
 import tempfile
 import shutil
+import time
 import yaml
+from contextlib import redirect_stdout
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -134,6 +137,25 @@ namespace test {
         self.assertEqual(config.get("compiler"), "g++")
         self.assertEqual(config.get("project_type"), "executable")
 
+    def test_load_config_cached(self):
+        import insurgent.Meta.config as config_module
+
+        config_path = os.path.join(self.project_dir, "project.yaml")
+        with patch.object(
+            config_module, "load_config", wraps=config_module.load_config
+        ) as mock_load:
+            first = config_module.load_config_cached(config_path)
+            self.assertIs(config_module.load_config_cached(config_path), first)
+            self.assertEqual(mock_load.call_count, 1)
+
+            # Rewriting the file invalidates the cached copy
+            with open(config_path, "a", encoding="utf-8") as f:
+                f.write("version: 2.0.0\n")
+            self.assertEqual(
+                config_module.load_config_cached(config_path)["version"], "2.0.0"
+            )
+            self.assertEqual(mock_load.call_count, 2)
+
     def test_build_with_options(self):
         """Test the build process with options"""
         # Verify paths exist
@@ -173,5 +195,1156 @@ namespace test {
             mock_build.assert_called_once()
 
 
+class TestBuildEngineCache(unittest.TestCase):
+    def setUp(self):
+        """Set up a minimal project for exercising the build cache."""
+        self.project_dir = tempfile.mkdtemp(prefix="insurgent_cache_test_")
+        os.makedirs(os.path.join(self.project_dir, "sources"))
+        with open(
+            os.path.join(self.project_dir, "project.yaml"), "w", encoding="utf-8"
+        ) as f:
+            yaml.dump(
+                {
+                    "project": "cache-test",
+                    "authors": ["Test Author"],
+                    "license": "MIT",
+                    "language": "c",
+                    "standard": "c11",
+                    "compiler": "gcc",
+                    "project_dirs": ["sources"],
+                    "project_type": "executable",
+                    "output": "bin/cache-test",
+                },
+                f,
+            )
+        self.source_path = os.path.join(self.project_dir, "sources", "main.c")
+        with open(self.source_path, "w", encoding="utf-8") as f:
+            f.write("int main(void) { return 0; }\n")
+        # Backdate the source so its mtime is outside the racy window
+        self._set_mtime(self.source_path, -60)
+
+    @staticmethod
+    def _set_mtime(path, offset_seconds):
+        mtime_ns = time.time_ns() + offset_seconds * 10**9
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+    def tearDown(self):
+        shutil.rmtree(self.project_dir, ignore_errors=True)
+
+    def test_file_change_detection(self):
+        from insurgent.Build.BuildEngine import BuildEngine
+
+        engine = BuildEngine(self.project_dir)
+
+        # Unknown files are always considered changed
+        self.assertTrue(engine._has_file_changed(self.source_path))
+        # Same size and mtime short-circuits without rehashing
+        with patch.object(engine, "_hash_file") as mock_hash:
+            self.assertFalse(engine._has_file_changed(self.source_path))
+            mock_hash.assert_not_called()
+
+        # Touching the file without changing contents keeps the digest
+        self._set_mtime(self.source_path, -30)
+        self.assertFalse(engine._has_file_changed(self.source_path))
+
+        with open(self.source_path, "w", encoding="utf-8") as f:
+            f.write("int main(void) { return 1; }\n")
+        self.assertTrue(engine._has_file_changed(self.source_path))
+
+    def test_racy_mtime_is_not_trusted(self):
+        from insurgent.Build.BuildEngine import BuildEngine
+
+        engine = BuildEngine(self.project_dir)
+
+        # A file fingerprinted right after being written is rehashed next time
+        self._set_mtime(self.source_path, 0)
+        self.assertTrue(engine._has_file_changed(self.source_path))
+        with open(self.source_path, "w", encoding="utf-8") as f:
+            f.write("int main(void) { return 2; }\n")
+        self._set_mtime(self.source_path, 0)
+        self.assertTrue(engine._has_file_changed(self.source_path))
+
+    def test_hash_file_streams_in_chunks(self):
+        import hashlib
+        from types import SimpleNamespace
+        from insurgent.Build import BuildEngine as engine_module
+
+        engine = engine_module.BuildEngine(self.project_dir)
+        big_file = os.path.join(self.project_dir, "sources", "big.c")
+        with open(big_file, "wb") as f:
+            f.write(os.urandom(3 * 1000 + 17))
+        expected = engine._hash_file(big_file)
+
+        # Pythons without hashlib.file_digest take the chunked read loop
+        old_hashlib = SimpleNamespace(blake2b=hashlib.blake2b)
+        with patch.object(engine_module, "HASH_CHUNK_SIZE", 1000), patch.object(
+            engine_module, "hashlib", old_hashlib
+        ):
+            self.assertEqual(engine._hash_file(big_file), expected)
+
+    def test_check_file_does_not_touch_cache(self):
+        from insurgent.Build.BuildEngine import BuildEngine
+
+        engine = BuildEngine(self.project_dir)
+
+        changed, fingerprint = engine._check_file(self.source_path)
+        self.assertTrue(changed)
+        self.assertEqual(fingerprint[0], os.path.getsize(self.source_path))
+        # Nothing is recorded until the caller decides the build succeeded
+        self.assertNotIn(self.source_path, engine.build_cache["file_hashes"])
+
+        engine._record_fingerprint(self.source_path, fingerprint)
+        self.assertEqual(engine._check_file(self.source_path), (False, fingerprint))
+
+    def test_prune_fingerprints(self):
+        from insurgent.Build.BuildEngine import BuildEngine
+
+        engine = BuildEngine(self.project_dir)
+        file_hashes = engine.build_cache["file_hashes"]
+        file_hashes.update(
+            {
+                self.source_path: [1, 1, "a"],
+                "/gone/old.c": [1, 1, "b"],
+                "/include/used.h": [1, 1, "c"],
+            }
+        )
+
+        engine._prune_fingerprints([self.source_path], {"/include/used.h": None})
+        self.assertEqual(
+            sorted(file_hashes), sorted([self.source_path, "/include/used.h"])
+        )
+        self.assertTrue(engine._cache_dirty)
+
+    def test_ignore_patterns(self):
+        from insurgent.Build.BuildEngine import BuildEngine
+
+        for name in ["skip_me.c", "generated.c", "keep.c"]:
+            with open(
+                os.path.join(self.project_dir, "sources", name), "w", encoding="utf-8"
+            ) as f:
+                f.write("int x;\n")
+
+        engine = BuildEngine(self.project_dir)
+        engine.config["ignore"] = ["skip_", "gen*.c"]
+        names = sorted(os.path.basename(f) for f in engine._find_source_files())
+        self.assertEqual(names, ["keep.c", "main.c"])
+
+    def test_symlinked_source_dirs(self):
+        from insurgent.Build.BuildEngine import BuildEngine
+
+        shared = os.path.join(self.project_dir, "shared")
+        os.makedirs(shared)
+        with open(os.path.join(shared, "util.c"), "w", encoding="utf-8") as f:
+            f.write("int util(void) { return 0; }\n")
+        sources = os.path.join(self.project_dir, "sources")
+        try:
+            os.symlink(shared, os.path.join(sources, "shared"))
+            # A link back to an ancestor must not be walked forever
+            os.symlink(sources, os.path.join(shared, "loop"))
+        except (OSError, NotImplementedError):
+            self.skipTest("symlinks are not supported here")
+
+        engine = BuildEngine(self.project_dir)
+        names = sorted(os.path.basename(f) for f in engine._find_source_files())
+        self.assertEqual(names, ["main.c", "util.c"])
+
+    def test_engine_registry(self):
+        from insurgent.Build.BuildEngine import BuildEngine
+
+        engine = BuildEngine(self.project_dir)
+        self.assertIs(BuildEngine(os.path.join(self.project_dir, ".")), engine)
+
+        # Editing project.yaml invalidates the registered engine
+        config_path = os.path.join(self.project_dir, "project.yaml")
+        with open(config_path, "a", encoding="utf-8") as f:
+            f.write("version: 1.2.3\n")
+        reloaded = BuildEngine(self.project_dir)
+        self.assertIsNot(reloaded, engine)
+        self.assertEqual(reloaded.config.get("version"), "1.2.3")
+
+    def test_explicit_config_gets_private_engine(self):
+        from insurgent.Build import BuildEngine as engine_module
+        from insurgent.Meta import config as config_module
+
+        engine = engine_module.BuildEngine(self.project_dir)
+        config_path = os.path.join(self.project_dir, "project.yaml")
+        # The engine's copy, not the memoized config, gets annotated
+        memoized = config_module._CONFIG_CACHE[config_path][1]
+        self.assertNotIn("_config_path", memoized)
+
+        custom = dict(memoized, output="bin/custom")
+        private = engine_module.BuildEngine(self.project_dir, custom)
+        self.assertIsNot(private, engine)
+        self.assertEqual(private.config["output"], "bin/custom")
+        self.assertNotIn("_config_path", custom)
+
+        # The shared engine is left untouched
+        self.assertIs(engine_module.BuildEngine(self.project_dir), engine)
+        self.assertEqual(engine.config["output"], "bin/cache-test")
+
+    def test_engine_creates_no_output_dirs(self):
+        from insurgent.Build.BuildEngine import BuildEngine
+
+        BuildEngine(self.project_dir).get_project_info()
+        self.assertFalse(os.path.exists(os.path.join(self.project_dir, "bin")))
+
+    def test_subproject_engines_are_lazy(self):
+        from insurgent.Build.BuildEngine import BuildEngine
+
+        sub_dir = os.path.join(self.project_dir, "lib")
+        os.makedirs(os.path.join(sub_dir, "sources"))
+        with open(os.path.join(sub_dir, "project.yaml"), "w", encoding="utf-8") as f:
+            yaml.dump({"project": "lib", "project_dirs": ["sources"]}, f)
+        config_path = os.path.join(self.project_dir, "project.yaml")
+        with open(config_path, "a", encoding="utf-8") as f:
+            f.write("subprojects:\n- lib\n")
+
+        engine = BuildEngine(self.project_dir)
+        self.assertIsNone(engine._subproject_engines)
+        self.assertFalse(os.path.exists(os.path.join(sub_dir, "obj")))
+
+        self.assertEqual(list(engine.subproject_engines), ["lib"])
+        self.assertIs(engine.subproject_engines["lib"], BuildEngine(sub_dir))
+
+    def test_build_cache_survives_bad_files(self):
+        from insurgent.Build.BuildEngine import BuildEngine
+
+        engine = BuildEngine(self.project_dir)
+        for contents in ['{"file_hashes": {"a.c": [1, 2', "[]"]:
+            os.makedirs(engine.build_dir, exist_ok=True)
+            with open(engine.cache_file, "w", encoding="utf-8") as f:
+                f.write(contents)
+            self.assertEqual(engine._load_build_cache()["file_hashes"], {})
+
+        engine.build_cache = engine._load_build_cache()
+        engine._record_fingerprint(self.source_path, [1, 2, "digest"])
+        engine._save_build_cache()
+        leftovers = [f for f in os.listdir(engine.build_dir) if f.endswith(".tmp")]
+        self.assertEqual(leftovers, [])
+        self.assertIn(self.source_path, engine._load_build_cache()["file_hashes"])
+
+    def test_config_sidecar(self):
+        from insurgent.Build import BuildEngine as engine_module
+        from insurgent.Meta import config as config_module
+
+        engine = engine_module.BuildEngine(self.project_dir)
+        config_path = os.path.join(self.project_dir, "project.yaml")
+        sidecar = os.path.join(self.project_dir, "obj", "project.yaml.json")
+        self.assertTrue(os.path.exists(sidecar))
+
+        # The shell shares the engine's in-process copy
+        with patch.object(config_module, "load_config") as mock_load:
+            config_module.load_config_cached(config_path)
+            mock_load.assert_not_called()
+
+        # A fresh process reads the side-car instead of parsing YAML again
+        config_module._CONFIG_CACHE.clear()
+        with patch.object(engine_module, "load_config") as mock_load:
+            config = engine._load_project_config_cached(config_path)
+            mock_load.assert_not_called()
+        self.assertEqual(config.get("project"), "cache-test")
+
+    def test_config_sidecar_skips_lossy_configs(self):
+        from insurgent.Build import BuildEngine as engine_module
+
+        config_path = os.path.join(self.project_dir, "project.yaml")
+        with open(config_path, "a", encoding="utf-8") as f:
+            f.write("defines:\n  1: one\n")
+        engine = engine_module.BuildEngine(self.project_dir)
+
+        # Integer keys would come back from JSON as strings
+        self.assertIn(1, engine.config["defines"])
+        sidecar = os.path.join(self.project_dir, "obj", "project.yaml.json")
+        self.assertFalse(os.path.exists(sidecar))
+
+    def test_compile_parallel_respects_job_limit(self):
+        import asyncio
+        from insurgent.Build.BuildEngine import BuildEngine
+
+        engine = BuildEngine(self.project_dir)
+        engine.jobs = 2
+        running = 0
+        peak = 0
+
+        async def fake_compile(source_file, obj_file, file_type, silent):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return True
+
+        files = [(f"{i}.c", f"{i}.o", "c") for i in range(6)]
+        with patch.object(engine, "_compile_file", side_effect=fake_compile):
+            self.assertTrue(asyncio.run(engine._compile_parallel(files, True)))
+        self.assertEqual(peak, 2)
+
+    def test_compile_parallel_stops_on_failure(self):
+        import asyncio
+        from insurgent.Build.BuildEngine import BuildEngine
+
+        engine = BuildEngine(self.project_dir)
+        engine.jobs = 2
+        finished = []
+
+        async def fake_compile(source_file, obj_file, file_type, silent):
+            if source_file == "bad.c":
+                return False
+            await asyncio.sleep(0.05)
+            finished.append(source_file)
+            return True
+
+        files = [("bad.c", "bad.o", "c")] + [
+            (f"{i}.c", f"{i}.o", "c") for i in range(4)
+        ]
+        with patch.object(engine, "_compile_file", side_effect=fake_compile):
+            self.assertFalse(asyncio.run(engine._compile_parallel(files, True)))
+        # Compiles still queued behind the failure are cancelled
+        self.assertLess(len(finished), 4)
+
+    def test_compiler_cache_launcher(self):
+        from insurgent.Build import BuildEngine as engine_module
+
+        engine = engine_module.BuildEngine(self.project_dir)
+
+        def fake_which(name, path=None):
+            if name == "ccache" and path != "/opt/empty":
+                return f"/usr/bin/{name}"
+            return None
+
+        engine_module._resolve_compiler_cache.cache_clear()
+        self.addCleanup(engine_module._resolve_compiler_cache.cache_clear)
+        with patch.object(engine_module.shutil, "which", side_effect=fake_which):
+            engine._refresh_compiler_flags()
+            self.assertEqual(engine._compile_prefix["c"][:2], ["ccache", "gcc"])
+            # Assembly isn't routed through the compiler cache
+            self.assertNotIn("ccache", engine._compile_prefix["asm"])
+
+            # A launcher that leaves PATH is no longer used
+            with patch.dict(os.environ, {"PATH": "/opt/empty"}):
+                engine._refresh_compiler_flags()
+                self.assertEqual(engine._compile_prefix["c"][0], "gcc")
+
+            engine.c_compiler = "ccache gcc"
+            engine._refresh_compiler_flags()
+            self.assertEqual(engine._compile_prefix["c"][:2], ["ccache", "gcc"])
+
+            engine.config["compiler_cache"] = False
+            engine._refresh_compiler_flags()
+            self.assertNotIn("ccache", engine._compile_prefix["cpp"])
+
+    def test_compiled_sources_are_hashed_once(self):
+        import asyncio
+        from insurgent.Build.BuildEngine import BuildEngine
+
+        engine = BuildEngine(self.project_dir)
+        engine.config["bootstrap"] = []
+
+        async def fake_compile(source_file, obj_file, file_type, silent):
+            with open(obj_file, "wb"):
+                pass
+            return True
+
+        async def fake_link(obj_files, output_file, silent):
+            with open(output_file, "wb"):
+                pass
+            return True
+
+        with patch.object(
+            engine, "_compile_file", side_effect=fake_compile
+        ), patch.object(
+            engine, "_link_executable", side_effect=fake_link
+        ), patch.object(
+            engine, "_hash_file", wraps=engine._hash_file
+        ) as hash_spy:
+            build = engine._build_with_options(incremental=True, silent=True)
+            self.assertTrue(asyncio.run(build))
+            # The fingerprint taken before compiling is reused afterwards
+            self.assertEqual(hash_spy.call_count, 1)
+        self.assertIn(self.source_path, engine.build_cache["file_hashes"])
+
+    def test_noop_build_short_circuits(self):
+        import asyncio
+        from insurgent.Build.BuildEngine import BuildEngine
+
+        engine = BuildEngine(self.project_dir)
+        engine.config["bootstrap"] = []
+        compiled = []
+
+        async def fake_compile(source_file, obj_file, file_type, silent):
+            compiled.append(source_file)
+            with open(obj_file, "wb"):
+                pass
+            return True
+
+        async def fake_link(obj_files, output_file, silent):
+            with open(output_file, "wb"):
+                pass
+            return True
+
+        def build():
+            return asyncio.run(
+                engine._build_with_options(incremental=True, silent=True)
+            )
+
+        with patch.object(
+            engine, "_compile_file", side_effect=fake_compile
+        ), patch.object(engine, "_link_executable", side_effect=fake_link):
+            self.assertTrue(build())
+            with patch.object(engine, "_get_link_state") as link_state:
+                self.assertTrue(build())
+                # Nothing past the source walk runs when nothing changed
+                link_state.assert_not_called()
+
+            with open(self.source_path, "w", encoding="utf-8") as f:
+                f.write("int main(void) { return 3; }\n")
+            self._set_mtime(self.source_path, -10)
+            self.assertTrue(build())
+        self.assertEqual(compiled, [self.source_path, self.source_path])
+
+    def test_emit_ninja(self):
+        from insurgent.Build.BuildEngine import BuildEngine
+
+        spaced = os.path.join(self.project_dir, "sources", "my file.c")
+        with open(spaced, "w", encoding="utf-8") as f:
+            f.write("int f(void) { return 0; }\n")
+        engine = BuildEngine(self.project_dir)
+        engine._refresh_compiler_flags()
+        sources = [(path, None, "c") for path in engine._find_source_files()]
+        output_file = os.path.join(self.project_dir, "bin", "cache-test")
+
+        ninja_file = engine._emit_ninja(sources, output_file, "executable")
+        with open(ninja_file, encoding="utf-8") as f:
+            contents = f.read()
+        self.assertIn("rule cc\n", contents)
+        self.assertIn("deps = gcc", contents)
+        self.assertIn("my$ file.c", contents)
+        self.assertIn(f"default {output_file}", contents)
+
+        # An unchanged build graph leaves the file alone
+        self._set_mtime(ninja_file, -60)
+        mtime = os.stat(ninja_file).st_mtime_ns
+        engine._emit_ninja(sources, output_file, "executable")
+        self.assertEqual(os.stat(ninja_file).st_mtime_ns, mtime)
+
+    def test_ninja_resolves_relative_include_dirs(self):
+        import asyncio
+        from insurgent.Build.BuildEngine import BuildEngine
+
+        os.makedirs(os.path.join(self.project_dir, "include"))
+        engine = BuildEngine(self.project_dir)
+        engine.config["include_dirs"] = ["include"]
+        engine._refresh_compiler_flags()
+        sources = [(path, None, "c") for path in engine._find_source_files()]
+        output_file = os.path.join(self.project_dir, "bin", "cache-test")
+
+        calls = []
+
+        async def fake_run_process(argv, silent=False, cwd=None, **kwargs):
+            calls.append((argv, cwd))
+            return 0, b""
+
+        with patch.object(engine, "_run_process", side_effect=fake_run_process):
+            self.assertTrue(
+                asyncio.run(
+                    engine._build_with_ninja(
+                        sources, output_file, "executable", True, True, True
+                    )
+                )
+            )
+
+        self.assertEqual(len(calls), 1)
+        argv, cwd = calls[0]
+        with open(argv[argv.index("-f") + 1], encoding="utf-8") as f:
+            contents = f.read()
+        self.assertIn(" -Iinclude ", contents)
+        # The include dir is relative to where ninja runs the compiler
+        self.assertTrue(os.path.isdir(os.path.join(cwd, "include")))
+        self.assertIn(f"builddir = {engine.build_dir}", contents)
+
+    def test_relative_path(self):
+        from insurgent.Build.BuildEngine import BuildEngine
+
+        engine = BuildEngine(self.project_dir)
+        self.assertEqual(
+            engine._relative_path(self.source_path),
+            os.path.join("sources", "main.c"),
+        )
+        outside = os.path.join(os.path.dirname(self.project_dir), "other", "x.c")
+        self.assertEqual(
+            engine._relative_path(outside),
+            os.path.relpath(outside, self.project_dir),
+        )
+        self.assertEqual(
+            engine._get_object_file_path(self.source_path),
+            os.path.join(engine.build_dir, "sources", "main.c.o"),
+        )
+
+    def test_parse_depfile(self):
+        from insurgent.Build.BuildEngine import _parse_depfile
+
+        deps = _parse_depfile(
+            "obj/my\\ src/main.c.o: my\\ src/main.c \\\n"
+            " include/a.h include/cost$$.h\n"
+            "include/a.h:\n"
+        )
+        self.assertEqual(deps, ["my src/main.c", "include/a.h", "include/cost$.h"])
+        self.assertIsNone(_parse_depfile(""))
+
+    def test_header_change_detection(self):
+        from insurgent.Build.BuildEngine import BuildEngine
+
+        engine = BuildEngine(self.project_dir)
+        header = os.path.join(self.project_dir, "sources", "config.h")
+        with open(header, "w", encoding="utf-8") as f:
+            f.write("#define VALUE 1\n")
+        self._set_mtime(header, -60)
+        obj_file = engine._get_object_file_path(self.source_path)
+        os.makedirs(os.path.dirname(obj_file), exist_ok=True)
+        with open(engine._get_deps_file_path(obj_file), "w", encoding="utf-8") as f:
+            f.write(f"{obj_file}: {self.source_path} {header}\n{header}:\n")
+
+        deps = engine._load_deps(obj_file)
+        self.assertEqual(deps, [header])
+        engine._record_fingerprint(header, engine._check_file(header)[1])
+        self.assertFalse(engine._deps_changed(deps, {}))
+
+        with open(header, "w", encoding="utf-8") as f:
+            f.write("#define VALUE 2\n")
+        self.assertTrue(engine._deps_changed(deps, {}))
+
+
+class TestBuildTask(unittest.TestCase):
+    def test_cpu_tasks_use_process_pool(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from insurgent.Build.BuildTask import BuildTask
+
+        action = MagicMock()
+        pool = MagicMock(wraps=ThreadPoolExecutor(max_workers=1))
+        self.addCleanup(pool.shutdown)
+
+        BuildTask("io-target", action).execute(pool)
+        pool.submit.assert_not_called()
+
+        task = BuildTask("cpu-target", action, kind="cpu")
+        task.execute(pool)
+        pool.submit.assert_called_once_with(action)
+        self.assertTrue(task.completed)
+        self.assertEqual(action.call_count, 2)
+
+    def test_duration_is_monotonic(self):
+        from insurgent.Build.BuildTask import BuildTask
+
+        task = BuildTask("target", MagicMock())
+        self.assertEqual(task.duration(), 0)
+        # A wall-clock jump during the task must not skew its duration
+        with patch("time.time", side_effect=[1e9, 0.0]):
+            task.execute()
+        self.assertGreaterEqual(task.duration(), 0)
+        self.assertLess(task.duration(), 1)
+
+    def test_failed_task_keeps_traceback(self):
+        from insurgent.Build.BuildTask import BuildTask
+
+        task = BuildTask("broken", MagicMock(side_effect=RuntimeError("boom")))
+        task.execute()
+        self.assertTrue(task.failed)
+        self.assertEqual(task.error, "boom")
+        self.assertIn("RuntimeError: boom", task.output[0])
+
+
+class TestSharedEventLoop(unittest.TestCase):
+    def test_coroutines_share_one_background_loop(self):
+        import asyncio
+        import threading
+        from insurgent.Build import build as build_module
+
+        async def current_loop():
+            return asyncio.get_running_loop(), threading.current_thread()
+
+        first_loop, first_thread = build_module._run(current_loop())
+        second_loop, _ = build_module._ensure_coroutine_awaited(current_loop())
+        self.assertIs(first_loop, second_loop)
+        self.assertIsNot(first_thread, threading.current_thread())
+
+        async def nested():
+            # Blocking on the loop from its own thread would deadlock
+            return build_module._run(current_loop())
+
+        with self.assertRaises(RuntimeError):
+            build_module._run(nested())
+
+        async def from_other_loop():
+            return build_module._ensure_coroutine_awaited(current_loop())
+
+        self.assertIs(asyncio.run(from_other_loop())[0], first_loop)
+
+    def test_interrupted_run_cancels_coroutine(self):
+        import asyncio
+        import concurrent.futures
+        import threading
+        from insurgent.Build import build as build_module
+
+        started = threading.Event()
+        cancelled = threading.Event()
+
+        async def work():
+            started.set()
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        def interrupted_result(future, timeout=None):
+            started.wait(5)
+            raise KeyboardInterrupt
+
+        with patch.object(concurrent.futures.Future, "result", interrupted_result):
+            with self.assertRaises(KeyboardInterrupt):
+                build_module._run(work())
+        self.assertTrue(cancelled.wait(5))
+
+
+class FakeProject:
+    def __init__(self, graph, fail=()):
+        self.graph = graph
+        self.fail = set(fail)
+        self.built = []
+
+    def get_target_dependencies(self, target):
+        return self.graph[target]
+
+    def get_target_action(self, target):
+        def action():
+            if target in self.fail:
+                raise RuntimeError(f"{target} failed")
+            self.built.append(target)
+
+        return action
+
+
+def _write_marker(path):
+    """Picklable CPU-bound action used by the process pool tests"""
+    with open(path, "w") as f:
+        f.write(str(os.getpid()))
+
+
+class TestParallelBuildManager(unittest.TestCase):
+    def test_idle_workers_steal_queued_targets(self):
+        from insurgent.Build.ParallelBuildManager import ParallelBuildManager
+
+        targets = [f"t{i}" for i in range(32)]
+        project = FakeProject({target: [] for target in targets})
+        manager = ParallelBuildManager(project, max_workers=4)
+        manager.running = True
+        manager.local_queues[0].extend(targets[:8])
+        for target in targets[8:]:
+            manager._push(target)
+        # Worker 0 drains its own queue in one batch, then steals one at a time
+        own = list(manager.local_queues[0])
+        self.assertEqual(manager._next_batch(0), own)
+        taken = own + [t for _ in targets for t in manager._next_batch(0)]
+        self.assertCountEqual(taken, targets)
+        self.assertEqual(manager._next_batch(0), [])
+
+        self.assertTrue(manager.build(targets))
+        self.assertCountEqual(project.built, targets)
+        manager.close()
+
+    def test_dependencies_build_in_order(self):
+        from insurgent.Build.ParallelBuildManager import ParallelBuildManager
+
+        graph = {
+            "app": ["libA", "libB"],
+            "libA": ["core"],
+            "libB": ["core"],
+            "core": [],
+            "tool": ["libB"],
+        }
+        project = FakeProject(graph)
+        manager = ParallelBuildManager(project, max_workers=4)
+        self.addCleanup(manager.close)
+
+        self.assertTrue(manager.build(["app", "tool"]))
+        order = project.built
+        self.assertCountEqual(order, graph)
+        for target, deps in graph.items():
+            for dep in deps:
+                self.assertLess(order.index(dep), order.index(target))
+
+    def test_failures_propagate_to_dependents(self):
+        from insurgent.Build.ParallelBuildManager import ParallelBuildManager
+
+        graph = {
+            "app": ["lib"],
+            "lib": ["core"],
+            "core": [],
+            "other": [],
+            "loop": ["cycle"],
+            "cycle": ["loop"],
+        }
+        project = FakeProject(graph, fail={"core"})
+        manager = ParallelBuildManager(project, max_workers=2, verbose=True)
+        self.addCleanup(manager.close)
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertFalse(manager.build(["app", "other", "loop"]))
+        self.assertEqual(output.getvalue().count("Skipping"), 4)
+        self.assertEqual(project.built, ["other"])
+        self.assertCountEqual(
+            manager.get_failed_targets(), ["app", "lib", "core", "loop", "cycle"]
+        )
+        self.assertEqual(manager.get_task_error("loop"), "Dependency cycle")
+
+    def test_cpu_bound_actions_get_cpu_tasks(self):
+        from insurgent.Build.ParallelBuildManager import ParallelBuildManager
+
+        project = FakeProject({"scan": [], "link": []})
+        actions = {"scan": MagicMock(cpu_bound=True), "link": MagicMock(spec=[])}
+        project.get_target_action = actions.get
+        manager = ParallelBuildManager(project, max_workers=1)
+        self.addCleanup(manager.close)
+
+        self.assertEqual(manager._create_task("scan").kind, "cpu")
+        self.assertEqual(manager._create_task("link").kind, "io")
+
+    def test_cpu_bound_action_runs_through_build(self):
+        import functools
+        from insurgent.Build.ParallelBuildManager import ParallelBuildManager
+
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        marker = os.path.join(temp_dir, "scan.done")
+
+        project = FakeProject({"scan": [], "link": ["scan"]})
+        io_action = project.get_target_action
+        project.get_target_action = lambda target: (
+            functools.partial(_write_marker, marker)
+            if target == "scan"
+            else io_action(target)
+        )
+        project.get_target_kind = lambda target: "cpu" if target == "scan" else "io"
+        manager = ParallelBuildManager(project, max_workers=2)
+        self.addCleanup(manager.close)
+
+        self.assertTrue(manager.build(["link"]))
+        self.assertIsNone(manager.process_pool)
+        with open(marker) as f:
+            # The action ran in a worker process, not in this one
+            self.assertNotEqual(int(f.read()), os.getpid())
+        self.assertEqual(project.built, ["link"])
+
+    def test_default_workers_follow_cpu_affinity(self):
+        from insurgent.Build.ParallelBuildManager import ParallelBuildManager
+
+        def workers(*args):
+            manager = ParallelBuildManager(FakeProject({}), *args)
+            return manager.max_workers, manager.cpu_workers
+
+        with patch("os.sched_getaffinity", return_value={0, 1, 2, 3}, create=True):
+            with patch.dict(os.environ, {"INSURGENT_MAX_JOBS": ""}):
+                self.assertEqual(workers(), (8, 4))
+            with patch.dict(os.environ, {"INSURGENT_MAX_JOBS": "2"}):
+                self.assertEqual(workers(), (2, 2))
+            with patch.dict(os.environ, {"INSURGENT_MAX_JOBS": "lots"}):
+                self.assertEqual(workers(), (8, 4))
+            # An explicit worker count is used as given
+            self.assertEqual(workers(16), (16, 4))
+            self.assertEqual(workers(3), (3, 3))
+
+    def test_target_lookups_are_cached_across_builds(self):
+        from insurgent.Build.ParallelBuildManager import ParallelBuildManager
+
+        project = FakeProject({"app": ["lib"], "lib": []})
+        project.get_target_dependencies = MagicMock(side_effect=project.graph.get)
+        manager = ParallelBuildManager(project, max_workers=2)
+        self.addCleanup(manager.close)
+
+        self.assertTrue(manager.build(["app"]))
+        self.assertTrue(manager.build(["app"]))
+        self.assertEqual(project.get_target_dependencies.call_count, 2)
+
+        manager.forget_targets()
+        self.assertTrue(manager.build(["lib"]))
+        self.assertEqual(project.get_target_dependencies.call_count, 3)
+
+        # Switching projects starts from scratch
+        manager.project = FakeProject({"app": []})
+        self.assertTrue(manager.build(["app"]))
+        self.assertEqual(manager.project.built, ["app"])
+
+    def test_worker_threads_persist_across_builds(self):
+        import threading
+        from insurgent.Build.ParallelBuildManager import ParallelBuildManager
+
+        threads = set()
+        project = MagicMock()
+        project.get_target_dependencies.return_value = []
+        project.get_target_action.return_value = lambda: threads.add(
+            threading.current_thread()
+        )
+        manager = ParallelBuildManager(project, max_workers=2)
+        self.addCleanup(manager.close)
+
+        self.assertTrue(manager.build(["a", "b", "c"]))
+        self.assertTrue(manager.build(["a", "b", "c"]))
+        # Both builds ran on the executor's long-lived threads
+        self.assertLessEqual(threads, set(manager.executor._threads))
+        self.assertTrue(all(t.name.startswith("insurgent-bld") for t in threads))
+
+
+class TestToolchain(unittest.TestCase):
+    def test_compiler_probes_are_cached(self):
+        from insurgent.Build import toolchain
+
+        toolchain._which_on_path.cache_clear()
+        toolchain._probe_version.cache_clear()
+        toolchain._detect_toolchain.cache_clear()
+        self.addCleanup(toolchain._which_on_path.cache_clear)
+        self.addCleanup(toolchain._probe_version.cache_clear)
+        self.addCleanup(toolchain._detect_toolchain.cache_clear)
+
+        with patch("shutil.which", return_value="/usr/bin/gcc") as mock_which, patch(
+            "subprocess.check_output", return_value="gcc (GCC) 13.2.0\nCopyright\n"
+        ) as mock_probe:
+            self.assertEqual(toolchain.get_toolchain(), "gcc")
+            self.assertEqual(toolchain.get_toolchain(), "gcc")
+            self.assertEqual(
+                toolchain.ToolchainManager.get_version(MagicMock(toolchain_name="gcc")),
+                "gcc (GCC) 13.2.0",
+            )
+            self.assertEqual(mock_which.call_count, 1)
+            self.assertEqual(mock_probe.call_count, 1)
+
+            # A different PATH is looked up afresh
+            with patch.dict(os.environ, {"PATH": "/opt/bin"}):
+                toolchain.get_toolchain()
+            self.assertEqual(mock_which.call_count, 2)
+
+    def test_missing_toolchain_is_remembered(self):
+        from insurgent.Build import toolchain
+
+        toolchain._which_on_path.cache_clear()
+        toolchain._detect_toolchain.cache_clear()
+        self.addCleanup(toolchain._which_on_path.cache_clear)
+        self.addCleanup(toolchain._detect_toolchain.cache_clear)
+
+        with patch("shutil.which", return_value=None) as mock_which, patch(
+            "subprocess.check_output"
+        ) as mock_probe:
+            self.assertEqual(toolchain.get_toolchain(), "")
+            self.assertEqual(toolchain.get_toolchain(), "")
+            self.assertEqual(mock_which.call_count, len(toolchain.SUPPORTED_TOOLCHAINS))
+            mock_probe.assert_not_called()
+
+    def test_manager_creates_dirs_lazily(self):
+        from insurgent.Build import toolchain
+
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        manager = toolchain.ToolchainManager(
+            toolchain_dir=os.path.join(temp_dir, "src"),
+            build_dir=os.path.join(temp_dir, "build"),
+            install_dir=os.path.join(temp_dir, "install", "bin"),
+        )
+        self.assertEqual(os.listdir(temp_dir), [])
+
+        manager._ensure_dirs()
+        self.assertCountEqual(os.listdir(temp_dir), ["src", "build", "install"])
+
+    def test_gcc_build_uses_available_cpus(self):
+        import asyncio
+        from unittest.mock import AsyncMock
+        from insurgent.Build import toolchain
+
+        manager = toolchain.ToolchainManager.__new__(toolchain.ToolchainManager)
+        manager.install_dir = "/opt/gcc"
+        manager.build_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, manager.build_dir)
+        manager.reconfigure = False
+        manager.run_command = AsyncMock(return_value=(True, ""))
+        source_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, source_dir)
+        configure_script = os.path.join(source_dir, "configure")
+        open(configure_script, "w").close()
+
+        with patch("insurgent.Build.toolchain._available_cpus", return_value=6):
+            self.assertTrue(asyncio.run(manager._build_gcc(source_dir)))
+
+        configure, make = manager.run_command.call_args_list
+        self.assertEqual(configure.args[0][0], configure_script)
+        self.assertEqual(make.args[0], ["make", "-j6"])
+        self.assertEqual(make.kwargs["env"]["MAKEFLAGS"], "-j6")
+
+        # A Makefile newer than configure means the tree is already configured
+        makefile = os.path.join(manager.build_dir, "Makefile")
+        open(makefile, "w").close()
+        os.utime(configure_script, ns=(0, 0))
+        manager.run_command.reset_mock()
+        asyncio.run(manager._build_gcc(source_dir))
+        self.assertEqual(manager.run_command.call_count, 1)
+
+        manager.reconfigure = True
+        manager.run_command.reset_mock()
+        asyncio.run(manager._build_gcc(source_dir))
+        self.assertEqual(manager.run_command.call_count, 2)
+
+    def test_download_streams_to_file(self):
+        from pathlib import Path
+        from insurgent.Build import toolchain
+
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        source = os.path.join(temp_dir, "source.tar.xz")
+        payload = os.urandom(3 * toolchain.DOWNLOAD_CHUNK_SIZE + 5)
+        with open(source, "wb") as f:
+            f.write(payload)
+
+        dest = os.path.join(temp_dir, "dest.tar.xz")
+        toolchain._download(Path(source).as_uri(), dest)
+        with open(dest, "rb") as f:
+            self.assertEqual(f.read(), payload)
+
+    def test_archive_cache_is_verified(self):
+        from pathlib import Path
+        from insurgent.Build import toolchain
+
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        source = os.path.join(temp_dir, "source.tar.xz")
+        with open(source, "wb") as f:
+            f.write(b"archive")
+        url = Path(source).as_uri()
+        cached = os.path.join(temp_dir, "cache.tar.xz")
+
+        self.assertFalse(toolchain._is_cached_archive(cached))
+        toolchain._download_to_cache(url, cached)
+        self.assertTrue(toolchain._is_cached_archive(cached))
+
+        # A corrupted archive no longer matches its recorded digest
+        with open(cached, "ab") as f:
+            f.write(b"junk")
+        self.assertFalse(toolchain._is_cached_archive(cached))
+
+        with self.assertRaises(ValueError):
+            toolchain._download_to_cache(url, cached, expected="0" * 64)
+        self.assertFalse(os.path.exists(cached + ".part"))
+
+    def test_extract_archive(self):
+        import tarfile
+        from insurgent.Build import toolchain
+
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        source_dir = os.path.join(temp_dir, "gcc-13.2.0")
+        os.makedirs(source_dir)
+        with open(os.path.join(source_dir, "configure"), "w") as f:
+            f.write("#!/bin/sh\n")
+        archive = os.path.join(temp_dir, "gcc-13.2.0.tar.xz")
+        with tarfile.open(archive, "w:xz") as tf:
+            tf.add(source_dir, arcname="gcc-13.2.0")
+
+        dest = os.path.join(temp_dir, "toolchain")
+        toolchain._extract_archive(archive, dest)
+        self.assertTrue(os.path.isfile(os.path.join(dest, "gcc-13.2.0", "configure")))
+
+    def test_run_command_keeps_output_tail(self):
+        import asyncio
+        from insurgent.Build import toolchain
+
+        manager = toolchain.ToolchainManager.__new__(toolchain.ToolchainManager)
+        manager.verbose = False
+        script = (
+            "import sys\n"
+            "for i in range(1000): print(i)\n"
+            "print('boom', file=sys.stderr)\n"
+            "sys.exit(3)\n"
+        )
+        with patch("insurgent.Build.toolchain.error"):
+            success, output = asyncio.run(
+                manager.run_command([sys.executable, "-c", script])
+            )
+        self.assertFalse(success)
+        lines = output.splitlines()
+        self.assertEqual(len(lines), toolchain.OUTPUT_TAIL_LINES)
+        self.assertEqual(lines[-1], "boom")
+
+    def test_run_command_reaps_child_on_overlong_line(self):
+        import asyncio
+        from insurgent.Build import toolchain
+
+        manager = toolchain.ToolchainManager.__new__(toolchain.ToolchainManager)
+        manager.verbose = False
+        script = "import time\nprint('x' * 4096, flush=True)\ntime.sleep(30)\n"
+        processes = []
+        create = asyncio.create_subprocess_exec
+
+        async def spawn(*args, **kwargs):
+            processes.append(await create(*args, **kwargs))
+            return processes[-1]
+
+        with patch.object(toolchain, "STREAM_LIMIT", 1024), patch.object(
+            toolchain.asyncio, "create_subprocess_exec", side_effect=spawn
+        ), patch("insurgent.Build.toolchain.error"):
+            start = time.monotonic()
+            success, _ = asyncio.run(
+                manager.run_command([sys.executable, "-c", script])
+            )
+        self.assertFalse(success)
+        self.assertIsNotNone(processes[0].returncode)
+        self.assertLess(time.monotonic() - start, 20)
+
+
+class TestLogFile(unittest.TestCase):
+    def test_entries_are_buffered_and_plain(self):
+        from insurgent.Logging import logger
+
+        buffer = io.StringIO()
+        with patch.object(logger, "_LOG_FILE", buffer), patch.object(
+            logger, "_open_log_file"
+        ) as mock_open:
+            logger.write_to_log_file("\033[1m\033[38;5;208m[BUILD]\033[0m done")
+            logger.write_to_log_file("second")
+            mock_open.assert_not_called()
+
+        lines = buffer.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].endswith("] [BUILD] done"))
+        self.assertNotIn("\033", buffer.getvalue())
+
+    def test_levels_share_one_emitter(self):
+        from insurgent.Logging import logger
+
+        with patch.object(logger, "write_to_log_file") as mock_write:
+            with redirect_stdout(io.StringIO()) as output:
+                logger.log("a")
+                logger.warning("b")
+                logger.info("c")
+                logger.success("d")
+                logger.error("e", use_box=False)
+        mock_write.assert_any_call("[BUILD] a", flush=False)
+        mock_write.assert_any_call("[ERROR] e", flush=True)
+        printed = output.getvalue()
+        for tag in ("[BUILD]", "[WARNING]", "[INFO]", "[SUCCESS]", "[ERROR]"):
+            self.assertIn(tag, printed)
+
+    def test_timestamp_is_reused_within_a_second(self):
+        from insurgent.Logging import logger
+
+        with patch.object(logger.time, "time", return_value=1000.2), patch.object(
+            logger.time, "strftime", wraps=logger.time.strftime
+        ) as mock_strftime:
+            first = logger._timestamp()
+            self.assertIs(logger._timestamp(), first)
+            self.assertEqual(mock_strftime.call_count, 1)
+
+
+class TestScorch(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        # Cleans delete their trash on a background thread that may still run
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+
+    def _make_project(self, *parts):
+        path = os.path.join(self.temp_dir, *parts)
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "project.yaml"), "w") as f:
+            f.write("project: test\n")
+        return path
+
+    def test_find_projects(self):
+        from insurgent.Build.scorch import _find_projects
+
+        expected = [
+            self._make_project("app"),
+            self._make_project("app", "lib"),
+            self._make_project("libs", "deep", "core"),
+        ]
+        os.makedirs(os.path.join(self.temp_dir, "empty", "dir"))
+        os.makedirs(os.path.join(self.temp_dir, "fake", "project.yaml"))
+        # Pruned and hidden directories are never searched
+        self._make_project("node_modules", "pkg")
+        self._make_project(".git", "modules")
+
+        self.assertCountEqual(_find_projects(self.temp_dir), expected)
+        self.assertCountEqual(
+            _find_projects(self.temp_dir, nested=False),
+            [expected[0], expected[2]],
+        )
+
+    def test_scorch_all_cleans_every_project(self):
+        import asyncio
+        from insurgent.Build.scorch import scorch_all
+
+        objects = []
+        for name in ("app", "tool"):
+            obj_dir = os.path.join(self._make_project(name), "obj")
+            os.makedirs(obj_dir)
+            objects.append(os.path.join(obj_dir, "main.o"))
+            open(objects[-1], "w").close()
+
+        cwd = os.getcwd()
+        self.assertTrue(asyncio.run(scorch_all(self.temp_dir)))
+        self.assertEqual(os.getcwd(), cwd)
+        for obj in objects:
+            self.assertFalse(os.path.exists(obj))
+
+    def test_scorch_all_cleans_subprojects_once_off_the_loop(self):
+        import asyncio
+        import threading
+        from insurgent.Build.BuildEngine import BuildEngine
+        from insurgent.Build.scorch import scorch_all
+
+        app = self._make_project("app")
+        lib = self._make_project("app", "lib")
+        with open(os.path.join(app, "project.yaml"), "a") as f:
+            f.write("subprojects:\n- lib\n")
+
+        cleaned = []
+        clean = BuildEngine._clean
+
+        def record_clean(engine, clean_subprojects=True):
+            cleaned.append((engine.project_path, threading.current_thread()))
+            return clean(engine, clean_subprojects)
+
+        with patch.object(BuildEngine, "_clean", autospec=True) as mock_clean:
+            mock_clean.side_effect = record_clean
+            self.assertTrue(asyncio.run(scorch_all(self.temp_dir)))
+
+        # lib is found on its own and as app's subproject
+        self.assertCountEqual([path for path, _ in cleaned], [app, lib])
+        for _, thread in cleaned:
+            self.assertIsNot(thread, threading.main_thread())
+
+    def test_scorch_all_without_nested_search(self):
+        import asyncio
+        from insurgent.Build.scorch import scorch_all
+
+        objects = []
+        for parts in (("app",), ("app", "lib"), ("app", "vendor")):
+            obj_dir = os.path.join(self._make_project(*parts), "obj")
+            os.makedirs(obj_dir)
+            objects.append(os.path.join(obj_dir, "main.o"))
+            open(objects[-1], "w").close()
+        with open(os.path.join(self.temp_dir, "app", "project.yaml"), "a") as f:
+            f.write("subprojects:\n- lib\n")
+
+        self.assertTrue(asyncio.run(scorch_all(self.temp_dir, ["--no-nested"])))
+        self.assertFalse(os.path.exists(objects[0]))
+        # Declared subprojects are still cleaned, other nested projects aren't
+        self.assertFalse(os.path.exists(objects[1]))
+        self.assertTrue(os.path.exists(objects[2]))
+
+    def test_scorch_all_sync_is_reentrant(self):
+        from insurgent.Build.scorch import scorch_all_sync
+
+        self._make_project("app")
+        # Repeated calls must not trip over a closed event loop
+        self.assertTrue(scorch_all_sync(self.temp_dir))
+        self.assertTrue(scorch_all_sync(self.temp_dir))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -158,5 +158,61 @@ class TestCompletions(unittest.TestCase):
         pass
 
 
+class TestCompleter(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp(prefix="insurgent_test_")
+        open(os.path.join(self.test_dir, "file1.txt"), "w").close()
+        os.makedirs(os.path.join(self.test_dir, "subdir"))
+
+    def tearDown(self):
+        import shutil
+
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_directory_contents_are_cached(self):
+        from insurgent.Shell.Completer import Completer
+
+        completer = Completer()
+        self.assertEqual(
+            completer._get_directory_contents(self.test_dir), ["file1.txt", "subdir/"]
+        )
+        with patch("os.scandir") as mock_scandir:
+            completer._get_directory_contents(self.test_dir)
+            mock_scandir.assert_not_called()
+
+        # A new entry changes the directory mtime and invalidates the listing
+        open(os.path.join(self.test_dir, "file2.txt"), "w").close()
+        os.utime(self.test_dir, ns=(0, 0))
+        self.assertIn("file2.txt", completer._get_directory_contents(self.test_dir))
+
+    def test_command_prefix_lookup(self):
+        from insurgent.Shell.Completer import Completer
+
+        completer = Completer(dict.fromkeys(["zeta", "bump", "alpha", "build", "b"]))
+        self.assertEqual(completer._complete_commands("bu"), ["build", "bump"])
+        self.assertEqual(completer._complete_commands("b"), ["b", "build", "bump"])
+        self.assertEqual(completer._complete_commands("c"), [])
+        self.assertEqual(
+            completer._complete_commands(""), ["alpha", "b", "build", "bump", "zeta"]
+        )
+
+    def test_complete_pages_through_cached_results(self):
+        from insurgent.Shell import Completer as completer_module
+
+        completer = completer_module.Completer({"build": None, "bump": None})
+        with patch.object(
+            completer, "get_completions", wraps=completer.get_completions
+        ) as mock_get:
+            results = [completer.complete("bu", state) for state in range(3)]
+            self.assertEqual(results, ["build", "bump", None])
+            self.assertEqual(mock_get.call_count, 1)
+
+        for i in range(completer_module.COMPLETIONS_CACHE_SIZE + 10):
+            completer.complete(f"x{i}", 0)
+        self.assertEqual(
+            len(completer.completions_cache), completer_module.COMPLETIONS_CACHE_SIZE
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
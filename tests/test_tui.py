@@ -11,9 +11,27 @@ from insurgent.TUI.table import Table
 from insurgent.TUI.theme import Theme
 
 
+def _reload_colors(test_case, tty):
+    """Reload the color constants as if stdout were (or weren't) a terminal"""
+    import importlib
+    from unittest.mock import patch
+    import insurgent.Logging.terminal as terminal
+    import insurgent.TUI.text as text
+
+    # Cleanups run last in, first out: terminal, then the modules built on it
+    test_case.addCleanup(importlib.reload, text)
+    test_case.addCleanup(importlib.reload, terminal)
+    with patch.object(sys.stdout, "isatty", return_value=tty, create=True):
+        importlib.reload(terminal)
+        importlib.reload(text)
+
+
 class TestText(unittest.TestCase):
     """Test cases for the Text class"""
 
+    def setUp(self):
+        _reload_colors(self, tty=True)
+
     def test_style_color(self):
         """Test applying color styling to text"""
         styled = Text.style("Hello", color="red")
@@ -173,6 +191,9 @@ class TestTable(unittest.TestCase):
 class TestTheme(unittest.TestCase):
     """Test cases for the Theme class"""
 
+    def setUp(self):
+        _reload_colors(self, tty=True)
+
     def test_theme_creation(self):
         """Test creating a theme"""
         theme = Theme()
@@ -241,5 +262,46 @@ class TestTheme(unittest.TestCase):
         self.assertIn("Hello", styled)
 
 
+class TestTerminalColors(unittest.TestCase):
+    """Test cases for the terminal color constants"""
+
+    def test_colors_follow_tty(self):
+        """Color codes are only emitted when stdout is a terminal"""
+        import importlib
+        from unittest.mock import patch
+        import insurgent.Logging.terminal as terminal
+
+        self.addCleanup(importlib.reload, terminal)
+        with patch.object(sys.stdout, "isatty", return_value=False, create=True):
+            importlib.reload(terminal)
+            self.assertEqual(terminal.GREEN, "")
+            self.assertEqual(terminal.RESET, "")
+        with patch.object(sys.stdout, "isatty", return_value=True, create=True):
+            importlib.reload(terminal)
+            self.assertEqual(terminal.GREEN, "\033[32m")
+            self.assertEqual(terminal.RESET, "\033[0m")
+
+    def test_piped_logger_output_is_plain(self):
+        """Log lines carry no escape codes when stdout isn't a terminal"""
+        import importlib
+        import io
+        from contextlib import redirect_stdout
+        from unittest.mock import patch
+        import insurgent.Logging.logger as logger
+
+        _reload_colors(self, tty=False)
+        # The level labels are styled once at import
+        self.addCleanup(importlib.reload, logger)
+        importlib.reload(logger)
+
+        with patch.object(logger, "write_to_log_file"):
+            with redirect_stdout(io.StringIO()) as output:
+                logger.info("plain")
+                logger.success("done", use_box=True)
+                logger.log(Text.style("styled", color="green", bold=True))
+        self.assertIn("[INFO] plain", output.getvalue())
+        self.assertNotIn("\033", output.getvalue())
+
+
 if __name__ == "__main__":
     unittest.main()